@@ -1,5 +1,6 @@
 import typer
 import os
+import multiprocessing
 import sys
 import signal
 import subprocess
@@ -9,12 +10,17 @@ import tempfile
 import urllib.request
 import json
 from pathlib import Path
+from typing import List
+from log_health import check_logs, summarize, human_size, MISSING_STATUSES, CHECK_WORKERS, CHECK_TIMEOUT
+from log_parser import load_profiles
+from term_index import TermIndex, build_term_index, drop_term_index, DEFAULT_MAX_MB
 from tracked_logs import (
     add_tracked_log, update_tracked_log, remove_tracked_log,
     remove_tracked_logs_bulk, remove_project,
-    load_tracked_logs, save_tracked_logs,
+    load_tracked_logs, save_tracked_logs, edit_tracked_logs,
     add_folder, group_logs_by_project, parse_alias,
-    TRACKED_LOGS_FILE, APP_DIR
+    get_alias_settings, update_alias_settings, migrate_store,
+    TRACKED_LOGS_FILE, TRACKED_LOGS_DB, APP_DIR
 )
 
 cli = typer.Typer()
@@ -105,11 +111,18 @@ def add_folder_cmd(
     folder_path: str = typer.Argument(..., help="Path to folder with log files"),
     project: str = typer.Option(None, "--project", "-p", help="Project name (default: folder name)"),
     all_files: bool = typer.Option(False, "--all", "-a", help="Include all files (not just .log)"),
-    pattern: str = typer.Option("*.log", "--pattern", "--ext", help="File pattern to match (default: *.log)")
+    pattern: str = typer.Option("*.log", "--pattern", "--ext", help="File pattern to match (default: *.log)"),
+    recursive: bool = typer.Option(False, "--recursive", "-r", help="Also add files from subfolders"),
+    include: List[str] = typer.Option(None, "--include", "-i", help="Glob to add, repeatable (overrides --pattern/--all)"),
+    exclude: List[str] = typer.Option(None, "--exclude", "-x", help="Glob for files or subfolders to skip, repeatable"),
+    workers: int = typer.Option(1, "--workers", "-w", help="Threads used to scan folders (helps on network filesystems)")
 ):
     """Add all log files from a folder as a project group"""
     try:
-        added = add_folder(folder_path, project=project, pattern=pattern, all_files=all_files)
+        added = add_folder(
+            folder_path, project=project, pattern=pattern, all_files=all_files,
+            recursive=recursive, include=include, exclude=exclude, workers=workers
+        )
         if not added:
             typer.echo("No new log files found to add.")
             return
@@ -133,6 +146,108 @@ def update(alias: str, path: str):
         raise typer.Exit(1)
 
 
+@cli.command()
+def config(
+    alias: str,
+    batch_lines: int = typer.Option(None, "--batch-lines", help="Send a live batch after this many lines (default: 50)"),
+    flush_interval: float = typer.Option(None, "--flush-interval", help="Send a live batch after this many seconds (default: 0.3)"),
+    parser: str = typer.Option(None, "--parser", help="Parser profile for field filters: auto (default), none, standard, logfmt, json or one from ~/.ezlog/parsers.json"),
+    search_index_mb: int = typer.Option(None, "--search-index-mb", help=f"Cap the search index of this log at this many MB; 0 turns it off (default: {DEFAULT_MAX_MB})"),
+    reset: bool = typer.Option(False, "--reset", help="Restore all options to their defaults")
+):
+    """Show or change live streaming, parsing and search index options for an alias"""
+    try:
+        if reset:
+            settings = update_alias_settings(alias, **{key: None for key in get_alias_settings(alias)})
+        elif any(value is not None for value in (batch_lines, flush_interval, parser, search_index_mb)):
+            if batch_lines is not None and batch_lines < 1:
+                raise ValueError("--batch-lines must be at least 1")
+            if flush_interval is not None and flush_interval <= 0:
+                raise ValueError("--flush-interval must be positive")
+            if parser is not None and parser not in ("auto", "none") and parser not in load_profiles():
+                raise ValueError(f"Unknown parser profile '{parser}' (known: {', '.join(load_profiles())})")
+            if search_index_mb is not None and search_index_mb < 0:
+                raise ValueError("--search-index-mb must be 0 or more")
+            # Only the options given change; None would reset the others
+            values = {}
+            if batch_lines is not None:
+                values["batch_lines"] = batch_lines
+            if flush_interval is not None:
+                values["batch_interval"] = flush_interval
+            if parser is not None:
+                values["parser"] = None if parser == "auto" else parser
+            if search_index_mb is not None:
+                values["search_index_mb"] = search_index_mb
+            settings = update_alias_settings(alias, **values)
+        else:
+            settings = get_alias_settings(alias)
+    except Exception as e:
+        typer.echo(f"[Error] {e}", err=True)
+        raise typer.Exit(1)
+
+    if not settings:
+        typer.echo(f"{alias}: using defaults")
+        return
+    typer.echo(f"{alias}:")
+    for key, value in settings.items():
+        typer.echo(f"  {key:15} {value}")
+
+
+def index_coverage(index, filepath):
+    """Describe which part of a log its search index covers"""
+    start, end = index.coverage()
+    if end <= start:
+        return "not indexed"
+    size = max(end, os.path.getsize(filepath))
+    where = f"bytes {human_size(start)}-{human_size(end)}" if start else f"first {human_size(end)}"
+    rest = "; the rest is scanned" if end - start < size else ""
+    return f"{where} of {human_size(size)} indexed ({(end - start) * 100 // size}%) in {human_size(index.nbytes)}{rest}"
+
+
+@cli.command("search-index")
+def search_index(
+    aliases: List[str] = typer.Argument(None, help="Aliases whose search index to rebuild or drop"),
+    all_logs: bool = typer.Option(False, "--all", help="Every tracked log"),
+    drop: bool = typer.Option(False, "--drop", help="Delete the indexes instead of rebuilding them"),
+    status: bool = typer.Option(False, "--status", help="Show what the indexes cover without rebuilding them")
+):
+    """Rebuild, drop or inspect the search indexes that speed up repeated full-file searches"""
+    data = load_tracked_logs()
+    if all_logs:
+        aliases = [*data]
+    if not aliases:
+        typer.echo("Specify aliases or use --all.")
+        typer.echo("Example: ezlog search-index myapp.api")
+        typer.echo("         ezlog search-index --all --status")
+        typer.echo("         ezlog search-index --all --drop")
+        return
+
+    failed = False
+    for alias in aliases:
+        try:
+            if alias not in data:
+                raise ValueError(f"Alias '{alias}' does not exist")
+            if drop:
+                dropped = drop_term_index(data[alias])
+                typer.echo(f"{alias}: {'dropped' if dropped else 'no index'}")
+                continue
+            if status:
+                typer.echo(f"{alias}: {index_coverage(TermIndex.load(data[alias]), data[alias])}")
+                continue
+            max_mb = get_alias_settings(alias).get("search_index_mb", DEFAULT_MAX_MB)
+            if max_mb <= 0:
+                typer.echo(f"{alias}: indexing is off (ezlog config {alias} --search-index-mb N)")
+                continue
+            index = build_term_index(data[alias], max_mb * 1024 * 1024)
+            note = " (size cap is below one segment)" if index.full else ""
+            typer.echo(f"✅ {alias}: {index_coverage(index, data[alias])}{note}")
+        except Exception as e:
+            typer.echo(f"[Error] {alias}: {e}", err=True)
+            failed = True
+    if failed:
+        raise typer.Exit(1)
+
+
 @cli.command()
 def remove(
     aliases: list[str] = typer.Argument(None, help="One or more alias names to remove"),
@@ -204,60 +319,105 @@ def clear(yes: bool = typer.Option(False, "--yes", "-y", help="Skip confirmation
     typer.echo(f"✅ Removed {len(data)} tracked logs")
 
 
+HEALTH_ICONS = {"ok": "✅", "missing": "❌", "not_a_file": "❌", "unreadable": "🔒", "timeout": "⏳", "error": "⚠️"}
+
+
+def format_age(seconds):
+    if seconds < 60:
+        return f"{int(seconds)}s ago"
+    if seconds < 3600:
+        return f"{int(seconds // 60)}m ago"
+    if seconds < 86400:
+        return f"{int(seconds // 3600)}h ago"
+    return f"{int(seconds // 86400)}d ago"
+
+
+def format_health_details(result):
+    if result["status"] in ("timeout", "error"):
+        return result.get("error", "no response") if result["status"] == "error" else "no response"
+    if result["size"] is None:
+        return result["status"].replace("_", " ")
+    details = f"{human_size(result['size']):>9}  modified {format_age(result['checked_at'] - result['mtime'])}"
+    growth = result["growth_bytes_per_sec"]
+    if growth:
+        details += f"  +{human_size(int(growth))}/s"
+    return details
+
+
 @cli.command()
-def check(missing_only: bool = typer.Option(False, "--missing-only", help="Show only missing files")):
-    """Check tracked logs and show whether each file exists"""
+def check(
+    missing_only: bool = typer.Option(False, "--missing-only", help="Show only missing files"),
+    as_json: bool = typer.Option(False, "--json", help="Print results as JSON (for monitoring)"),
+    workers: int = typer.Option(CHECK_WORKERS, "--workers", "-w", help="Paths checked in parallel"),
+    timeout: float = typer.Option(CHECK_TIMEOUT, "--timeout", help="Seconds before a single path is reported as not responding")
+):
+    """Check tracked logs: existence, readability, size, last write and growth"""
     data = load_tracked_logs()
+    results = check_logs(data, workers=workers, timeout=timeout)
+    summary = summarize(results)
+    if missing_only:
+        results = [r for r in results if r["status"] != "ok"]
+
+    if as_json:
+        typer.echo(json.dumps({"summary": summary, "logs": results}, indent=2))
+        return
     if not data:
         typer.echo("No logs tracked")
         return
 
+    by_alias = {r["alias"]: r for r in results}
     groups = group_logs_by_project(data)
-    missing_count = 0
-    total = len(data)
-
     for group_key in sorted(groups):
-        items = groups[group_key]
+        items = [(short, by_alias[info["alias"]]) for short, info in groups[group_key].items() if info["alias"] in by_alias]
+        if not items:
+            continue
         if group_key != "_root":
             typer.echo(f"\n📁 {group_key}:")
 
-        for short, info in items.items():
-            path = info["path"]
-            alias = info["alias"]
-            exists = os.path.isfile(path)
-            if not exists:
-                missing_count += 1
-            if missing_only and exists:
-                continue
-
-            status = "✅" if exists else "❌"
+        for short, result in items:
             prefix = "  " if group_key != "_root" else ""
-            typer.echo(f"{prefix}{status} {short:20} {path}")
+            status = HEALTH_ICONS.get(result["status"], "⚠️")
+            typer.echo(f"{prefix}{status} {short:20} {result['path']}  {format_health_details(result)}")
 
-    typer.echo(f"\nTotal: {total} | Missing: {missing_count} | Healthy: {total - missing_count}")
+    missing_count = sum(summary.get(s, 0) for s in MISSING_STATUSES)
+    typer.echo(
+        f"\nTotal: {summary['total']} | Missing: {missing_count} | Unreadable: {summary.get('unreadable', 0)} | "
+        f"Not responding: {summary.get('timeout', 0)} | Healthy: {summary.get('ok', 0)}"
+    )
 
 
 @cli.command()
 def prune(
     project: str = typer.Option(None, "--project", "-p", help="Scope to a specific project"),
-    yes: bool = typer.Option(False, "--yes", "-y", help="Skip confirmation prompt")
+    yes: bool = typer.Option(False, "--yes", "-y", help="Skip confirmation prompt"),
+    as_json: bool = typer.Option(False, "--json", help="Print JSON; only removes anything together with --yes"),
+    workers: int = typer.Option(CHECK_WORKERS, "--workers", "-w", help="Paths checked in parallel"),
+    timeout: float = typer.Option(CHECK_TIMEOUT, "--timeout", help="Seconds before a single path is reported as not responding")
 ):
     """Remove tracked aliases whose files no longer exist"""
     data = load_tracked_logs()
-    if not data:
-        typer.echo("No logs tracked")
-        return
-
     if project:
-        missing_aliases = [
-            alias for alias, path in data.items()
-            if parse_alias(alias)[0] == project and not os.path.isfile(path)
-        ]
+        data = {alias: path for alias, path in data.items() if parse_alias(alias)[0] == project}
         scope_msg = f" in project '{project}'"
     else:
-        missing_aliases = [alias for alias, path in data.items() if not os.path.isfile(path)]
         scope_msg = ""
 
+    # Paths that time out are kept: an unreachable mount is not a deleted file
+    results = check_logs(data, workers=workers, timeout=timeout)
+    missing_aliases = [r["alias"] for r in results if r["status"] in MISSING_STATUSES]
+
+    if as_json:
+        removed = bool(missing_aliases) and yes
+        if removed:
+            with edit_tracked_logs() as current:
+                for alias in missing_aliases:
+                    current.pop(alias, None)
+        typer.echo(json.dumps({"missing": missing_aliases, "removed": removed, "summary": summarize(results)}, indent=2))
+        return
+
+    if not data:
+        typer.echo(f"No logs tracked{scope_msg}")
+        return
     if not missing_aliases:
         typer.echo(f"No missing log paths found{scope_msg}")
         return
@@ -269,15 +429,19 @@ def prune(
     if not yes:
         typer.confirm(f"Remove {len(missing_aliases)} missing aliases?", abort=True)
 
-    for alias in missing_aliases:
-        del data[alias]
-
-    save_tracked_logs(data)
+    # Re-read under the lock so aliases added meanwhile are kept
+    with edit_tracked_logs() as current:
+        for alias in missing_aliases:
+            current.pop(alias, None)
     typer.echo(f"✅ Removed {len(missing_aliases)} missing aliases{scope_msg}")
 
 
 @cli.command()
-def start(port: int = 9200, host: str = "0.0.0.0"):
+def start(
+    port: int = 9200,
+    host: str = "0.0.0.0",
+    search_workers: int = typer.Option(0, "--search-workers", help="Processes used to search large files (default: CPU count, max 8)")
+):
     """Start ezlog in background"""
     if is_running():
         pid = get_pid()
@@ -297,8 +461,11 @@ def start(port: int = 9200, host: str = "0.0.0.0"):
         exe_path = [sys.executable, __file__]
     
     # Start background process
+    run_args = ["run", "--port", str(port), "--host", host]
+    if search_workers > 0:
+        run_args += ["--search-workers", str(search_workers)]
     process = subprocess.Popen(
-        exe_path + ["run", "--port", str(port), "--host", host],
+        exe_path + run_args,
         stdout=subprocess.DEVNULL,
         stderr=subprocess.DEVNULL,
         start_new_session=True
@@ -343,13 +510,17 @@ def status():
 
 
 @cli.command()
-def run(port: int = 9200, host: str = "0.0.0.0"):
+def run(
+    port: int = 9200,
+    host: str = "0.0.0.0",
+    search_workers: int = typer.Option(0, "--search-workers", help="Processes used to search large files (default: CPU count, max 8)")
+):
     """Run ezlog in foreground (for debugging)"""
     typer.echo(f"Starting ezlog on http://{host}:{port}")
     typer.echo("Press Ctrl+C to stop")
     save_run_config(port, host)
     from ezlog import start
-    start(port, host)
+    start(port, host, search_workers=search_workers)
 
 
 @cli.command()
@@ -370,8 +541,25 @@ def version():
 
 @cli.command("show-path")
 def show_path():
-    """Show the full path of the tracked logs JSON file"""
-    typer.echo(f"Tracked logs file is at: {TRACKED_LOGS_FILE}")
+    """Show the full path of the tracked logs store"""
+    store_file = TRACKED_LOGS_DB if TRACKED_LOGS_DB.exists() else TRACKED_LOGS_FILE
+    typer.echo(f"Tracked logs file is at: {store_file}")
+
+
+@cli.command("migrate-store")
+def migrate_store_cmd(
+    to: str = typer.Option("sqlite", "--to", help="Target backend: sqlite or json")
+):
+    """Move tracked logs to the SQLite store (for very large setups) or back to JSON"""
+    try:
+        moved = migrate_store(to)
+    except Exception as e:
+        typer.echo(f"[Error] {e}", err=True)
+        raise typer.Exit(1)
+    target = TRACKED_LOGS_DB if to == "sqlite" else TRACKED_LOGS_FILE
+    typer.echo(f"✅ Moved {moved} tracked logs to {target}")
+    if is_running():
+        typer.echo("The running server picks up the new store automatically.")
 
 
 @cli.command("show-dir")
@@ -513,4 +701,6 @@ def upgrade(
 
 
 if __name__ == "__main__":
+    # Lets the frozen binary act as a worker for the search process pool
+    multiprocessing.freeze_support()
     cli()
@@ -1,85 +1,276 @@
 import os
+import re
 import sys
 import asyncio
+from itertools import islice
 from pathlib import Path
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect, Request
+from typing import List
+from fastapi import FastAPI, WebSocket, WebSocketDisconnect, Request, Query
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
-from fastapi.responses import HTMLResponse, FileResponse
+from fastapi.responses import HTMLResponse, FileResponse, StreamingResponse
 import json
-from collections import deque
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from log_index import get_line_index, get_line_count, line_count_stats
+from log_tail import get_tail_hub, encode_batch, BATCH_LINES, BATCH_INTERVAL, PROTOCOLS
+import log_search
+from log_search import SearchQuery, iter_matches_parallel
+from log_parser import FieldFilter, get_profile
+from log_time import parse_at, format_key
+from term_index import get_term_index, schedule_term_index, DEFAULT_MAX_MB, MIN_FILE_BYTES
+from page_cache import page_cache
+from log_health import check_logs, summarize, human_size, CHECK_WORKERS, CHECK_TIMEOUT
+
+# Blocking file work runs on this pool so a heavy search never stalls live tailing
+IO_WORKERS = 8
+IO_TIMEOUT = 30.0       # seconds for history pages, metadata and plain searches
+SEARCH_TIMEOUT = 300.0  # seconds for a streamed search
+io_pool = ThreadPoolExecutor(max_workers=IO_WORKERS, thread_name_prefix="ezlog-io")
+# Full-file searches get their own threads, so long ones can't starve pages and connects
+SEARCH_THREADS = 4
+search_pool = ThreadPoolExecutor(max_workers=SEARCH_THREADS, thread_name_prefix="ezlog-search")
 
 
 def get_file_metadata(filepath):
     """Get file size and line count efficiently"""
-    if not os.path.exists(filepath):
+    try:
+        st = os.stat(filepath)
+    except OSError:
         return {"size": 0, "lines": 0, "size_human": "0 B"}
     
-    file_size = os.path.getsize(filepath)
+    file_size = st.st_size
     
-    # Count lines efficiently
-    line_count = 0
-    with open(filepath, 'rb') as f:
-        for _ in f:
-            line_count += 1
+    # Cached per file identity; only newly appended bytes are counted
+    line_count = get_line_count(filepath, st)
     
-    # Human-readable size
-    if file_size < 1024:
-        size_human = f"{file_size} B"
-    elif file_size < 1024 * 1024:
-        size_human = f"{file_size / 1024:.1f} KB"
-    elif file_size < 1024 * 1024 * 1024:
-        size_human = f"{file_size / (1024 * 1024):.1f} MB"
-    else:
-        size_human = f"{file_size / (1024 * 1024 * 1024):.2f} GB"
-    
-    return {"size": file_size, "lines": line_count, "size_human": size_human}
+    return {"size": file_size, "lines": line_count, "size_human": human_size(file_size)}
 
 
 def tail_file_lines(filepath, n=500):
-    """Get the last N lines from a file efficiently"""
+    """Get the last N lines from a file and the line number of the first one"""
     try:
-        with open(filepath, 'r', errors='replace') as f:
-            return list(deque(f, n))
+        # Reads backwards from EOF, so cost depends on N rather than file size
+        return get_line_index(filepath).tail(n)
     except:
-        return []
+        return [], 1
 
 
 def get_lines_range(filepath, start_line, count):
     """Get a range of lines from a file (1-indexed)"""
     try:
-        lines = []
-        with open(filepath, 'r', errors='replace') as f:
-            for i, line in enumerate(f, 1):
-                if i >= start_line and i < start_line + count:
-                    lines.append(line.rstrip())
-                if i >= start_line + count:
-                    break
-        return lines
+        # Seek via the sparse line index instead of scanning from byte 0;
+        # windows many viewers scroll through come from the page cache
+        return page_cache.read_lines(get_line_index(filepath), start_line, count)
     except:
         return []
 
 
-def search_file_lines(filepath, term, limit=200):
-    """Search entire file and return matching lines with line numbers"""
-    if not term:
+def search_file_lines(filepath, query, limit=200, cancel=None, index=None):
+    """Search entire file and return matching lines with line numbers (errors are raised)"""
+    if isinstance(query, str):
+        query = SearchQuery([query])
+    if query.is_empty:
         return []
+    return list(islice(iter_matches_parallel(filepath, query, limit, cancel=cancel, index=index), limit))
+
 
-    matches = []
-    term_lower = term.lower()
+def get_log_profile(alias, filepath):
+    """Parser profile for an alias: its "parser" setting, auto-detected by default"""
+    return get_profile(filepath, get_alias_settings(alias).get("parser", "auto"))
 
+
+def find_log_profile(alias, filepath):
+    """get_log_profile, or None if the log can't be read or the setting is invalid"""
     try:
-        with open(filepath, 'r', errors='replace') as f:
-            for line_no, line in enumerate(f, 1):
-                text = line.rstrip()
-                if term_lower in text.lower():
-                    matches.append({"line": line_no, "text": text})
-                    if len(matches) >= limit:
-                        break
+        return get_log_profile(alias, filepath)
     except:
-        return []
+        return None
+
+
+def build_field_filter(alias, filepath, where):
+    """FieldFilter for a where expression; raises ValueError if it can't be applied to this log"""
+    profile = get_log_profile(alias, filepath)
+    if profile is None:
+        raise ValueError(f"No parser profile matches {alias}; set one with `ezlog config {alias} --parser NAME`")
+    return FieldFilter(where, profile)
+
+
+def schedule_search_index(alias, filepath):
+    """Build or extend the search index of a large log in the background.
+
+    Returns whether the alias is indexed; the "search_index_mb" setting
+    caps the index size and 0 turns indexing off.
+    """
+    try:
+        max_mb = get_alias_settings(alias).get("search_index_mb", DEFAULT_MAX_MB)
+        if max_mb <= 0 or os.path.getsize(filepath) < MIN_FILE_BYTES:
+            return False
+        schedule_term_index(filepath, max_mb * 1024 * 1024)
+        return True
+    except:
+        return False
+
+
+def prepare_search_index(alias, filepath):
+    """The search index to narrow a search with (as far as it is built), or None"""
+    if not schedule_search_index(alias, filepath):
+        return None
+    try:
+        return get_term_index(filepath)
+    except:
+        return None
+
 
-    return matches
+def remember_file_metadata(alias, filepath, metadata):
+    """Store the last seen size, inode and line count for an alias (best effort)"""
+    try:
+        record_log_metadata(alias, metadata["size"], os.stat(filepath).st_ino, metadata["lines"])
+    except:
+        pass
+
+
+def find_line_at_time(filepath, at, total_lines):
+    """First line stamped at or after at (the last line if none is)"""
+    index = get_line_index(filepath)
+    key = parse_at(at, index.last_time())
+    return min(index.line_of(index.find_time(key)), max(1, total_lines)), format_key(key)
+
+
+def read_history_page(filepath, direction, before_line, around_line, count, at=""):
+    """Build one /history response page (blocking; runs on the I/O pool)"""
+    metadata = get_file_metadata(filepath)
+    total_lines = metadata["lines"]
+    target = {}
+
+    if direction == "time":
+        # Jump to time: a page around the first line at or after at
+        if not at:
+            return {"error": "at is required", "lines": []}
+        try:
+            around_line, target_time = find_line_at_time(filepath, at, total_lines)
+        except ValueError as e:
+            return {"error": str(e), "lines": []}
+        target = {"target_line": around_line, "target_time": target_time}
+        direction = "around"
+
+    if direction == "top":
+        # Fetch first N lines
+        lines = get_lines_range(filepath, 1, count)
+        start_line = 1
+        end_line = min(count, total_lines)
+        has_more = end_line < total_lines
+    elif direction == "around":
+        if around_line <= 0:
+            return {"error": "around_line is required", "lines": []}
+
+        half = max(1, count // 2)
+        start_line = max(1, around_line - half)
+        lines = get_lines_range(filepath, start_line, count)
+        end_line = min(total_lines, start_line + len(lines) - 1)
+        has_more = start_line > 1 or end_line < total_lines
+    else:  # direction == "up"
+        # Fetch lines before the given line
+        if before_line <= 1:
+            return {"lines": [], "start_line": 0, "end_line": 0, "has_more": False, "total_lines": total_lines}
+        
+        start_line = max(1, before_line - count)
+        lines = get_lines_range(filepath, start_line, before_line - start_line)
+        end_line = before_line - 1
+        has_more = start_line > 1
+    
+    return {
+        "lines": lines,
+        "start_line": start_line,
+        "end_line": end_line,
+        "has_more": has_more,
+        "total_lines": total_lines,
+        **target
+    }
+
+
+async def stream_search_results(filepath, query, limit, index=None):
+    """Yield search results as NDJSON: one line per match, then a summary line.
+
+    The scan runs on the I/O pool and hands matches back through a queue,
+    so the first hits are sent as soon as they are found. Closing the
+    response (client disconnect) or hitting SEARCH_TIMEOUT stops the scan.
+    """
+    loop = asyncio.get_running_loop()
+    queue = asyncio.Queue()
+    cancel = threading.Event()
+
+    def emit(item):
+        if not cancel.is_set():
+            try:
+                loop.call_soon_threadsafe(queue.put_nowait, item)
+            except RuntimeError:
+                # Event loop already closed (server shutting down)
+                cancel.set()
+
+    def produce():
+        try:
+            for n, match in enumerate(iter_matches_parallel(filepath, query, limit, cancel=cancel, index=index), 1):
+                emit(match)
+                if n >= limit:
+                    break
+        except Exception as e:
+            # OSError from the file, RuntimeError/CancelledError from the process pool
+            emit({"error": f"Search failed: {e}"})
+        finally:
+            emit(None)
+
+    loop.run_in_executor(search_pool, produce)
+    deadline = loop.time() + SEARCH_TIMEOUT
+    count = 0
+    try:
+        while True:
+            item = await asyncio.wait_for(queue.get(), max(0.0, deadline - loop.time()))
+            if item is None:
+                break
+            if "error" not in item:
+                count += 1
+            yield json.dumps(item) + "\n"
+    except asyncio.TimeoutError:
+        yield json.dumps({"error": "Search timed out"}) + "\n"
+    finally:
+        cancel.set()
+    yield json.dumps({"done": True, "count": count, "limit": limit, "truncated": count >= limit}) + "\n"
+
+
+async def wait_for_disconnect(request: Request):
+    while not await request.is_disconnected():
+        await asyncio.sleep(0.5)
+
+
+async def run_io(func, *args, request=None, cancel=None, timeout=IO_TIMEOUT, executor=io_pool):
+    """Run blocking file work on the bounded I/O pool (or ``executor``).
+
+    Raises asyncio.TimeoutError after ``timeout`` seconds and returns None
+    if ``request``'s client disconnects first. In both cases ``cancel`` (a
+    threading.Event) is set so cooperative work such as a search stops.
+    """
+    loop = asyncio.get_running_loop()
+    future = loop.run_in_executor(executor, partial(func, *args))
+    waiters = {future}
+    disconnect = None
+    if request is not None:
+        disconnect = asyncio.create_task(wait_for_disconnect(request))
+        waiters.add(disconnect)
+
+    try:
+        done, _ = await asyncio.wait(waiters, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+        if future in done:
+            return future.result()
+        if disconnect is not None and disconnect in done:
+            return None
+        raise asyncio.TimeoutError()
+    finally:
+        if disconnect is not None:
+            disconnect.cancel()
+        if not future.done() and cancel is not None:
+            cancel.set()
 
 
 def get_resource_path(relative_path):
@@ -94,13 +285,25 @@ def get_resource_path(relative_path):
 
 # --- Load your logs logic ---
 try:
-    from tracked_logs import load_tracked_logs, group_logs_by_project
+    from tracked_logs import (
+        load_tracked_logs, parse_alias, get_log_path, get_page_json, get_alias_settings, record_log_metadata
+    )
 except ImportError:
     # Dummy data for testing
     def load_tracked_logs():
         return {f"Project {i}": "test.log" for i in range(1, 50)}
-    def group_logs_by_project(data):
-        return {"_root": {k: {"alias": k, "path": v} for k, v in data.items()}}
+    def parse_alias(alias):
+        return None, alias
+    def get_log_path(alias):
+        return load_tracked_logs().get(alias)
+    def get_page_json():
+        logs = load_tracked_logs()
+        groups = {"_root": {k: {"alias": k, "path": v} for k, v in logs.items()}}
+        return json.dumps(logs), json.dumps(groups)
+    def get_alias_settings(alias):
+        return {}
+    def record_log_metadata(alias, size, inode, line_count):
+        pass
 
 app = FastAPI()
 
@@ -111,12 +314,11 @@ templates = Jinja2Templates(directory=get_resource_path("templates"))
 @app.get("/", response_class=HTMLResponse)
 async def get_home(request: Request):
     """Serves the UI shell."""
-    logs = load_tracked_logs()
-    groups = group_logs_by_project(logs)
+    aliases_json, groups_json = get_page_json()
     return templates.TemplateResponse("index.html", {
         "request": request, 
-        "aliases_json": json.dumps(logs),
-        "groups_json": json.dumps(groups),
+        "aliases_json": aliases_json,
+        "groups_json": groups_json,
         "initial_alias": ""
     })
 
@@ -124,94 +326,107 @@ async def get_home(request: Request):
 @app.get("/logs/{alias}", response_class=HTMLResponse)
 async def get_log_page(request: Request, alias: str):
     """Serves the UI shell with an initial alias from route"""
-    logs = load_tracked_logs()
-    groups = group_logs_by_project(logs)
-    initial_alias = alias if alias in logs else ""
+    aliases_json, groups_json = get_page_json()
+    initial_alias = alias if get_log_path(alias) is not None else ""
     return templates.TemplateResponse("index.html", {
         "request": request,
-        "aliases_json": json.dumps(logs),
-        "groups_json": json.dumps(groups),
+        "aliases_json": aliases_json,
+        "groups_json": groups_json,
         "initial_alias": initial_alias
     })
 
 @app.get("/api/logs/{alias}/history")
 async def get_log_history(
+    request: Request,
     alias: str,
     direction: str = "up",
     before_line: int = 0,
     around_line: int = 0,
-    count: int = 500
+    count: int = 500,
+    at: str = ""
 ):
-    """Fetch historical log lines for pagination"""
-    logs = load_tracked_logs()
-    
-    if alias not in logs:
+    """Fetch historical log lines for pagination, or the page around a time (direction=time)"""
+    filepath = get_log_path(alias)
+    if filepath is None:
         return {"error": "Log alias not found", "lines": []}
     
-    filepath = logs[alias]
-    
     if not os.path.exists(filepath):
         return {"error": "Log file not found", "lines": []}
     
-    metadata = get_file_metadata(filepath)
-    total_lines = metadata["lines"]
-    
-    if direction == "top":
-        # Fetch first N lines
-        lines = get_lines_range(filepath, 1, count)
-        start_line = 1
-        end_line = min(count, total_lines)
-        has_more = end_line < total_lines
-    elif direction == "around":
-        if around_line <= 0:
-            return {"error": "around_line is required", "lines": []}
-
-        half = max(1, count // 2)
-        start_line = max(1, around_line - half)
-        lines = get_lines_range(filepath, start_line, count)
-        end_line = min(total_lines, start_line + len(lines) - 1)
-        has_more = start_line > 1 or end_line < total_lines
-    else:  # direction == "up"
-        # Fetch lines before the given line
-        if before_line <= 1:
-            return {"lines": [], "start_line": 0, "end_line": 0, "has_more": False, "total_lines": total_lines}
-        
-        start_line = max(1, before_line - count)
-        lines = get_lines_range(filepath, start_line, before_line - start_line)
-        end_line = before_line - 1
-        has_more = start_line > 1
-    
-    return {
-        "lines": lines,
-        "start_line": start_line,
-        "end_line": end_line,
-        "has_more": has_more,
-        "total_lines": total_lines
-    }
+    try:
+        return await run_io(read_history_page, filepath, direction, before_line, around_line, count, at, request=request)
+    except asyncio.TimeoutError:
+        return {"error": "Timed out reading log file", "lines": []}
 
 
 @app.get("/api/logs/{alias}/search")
-async def search_log(alias: str, q: str, limit: int = 200):
-    """Search full log file content (not just currently loaded chunk)"""
-    logs = load_tracked_logs()
-
-    if alias not in logs:
+async def search_log(
+    request: Request,
+    alias: str,
+    q: List[str] = Query([]),
+    limit: int = 200,
+    mode: str = "any",
+    regex: bool = False,
+    case: bool = False,
+    levels: str = "",
+    where: str = "",
+    stream: bool = False
+):
+    """Search full log file content (not just currently loaded chunk).
+
+    Repeat q for several terms, combined with mode=any (OR) or mode=all (AND).
+    levels is a comma-separated list such as ERROR,WARN. where filters on
+    parsed fields, e.g. "level=ERROR latency_ms>1000". With stream=true the
+    results are sent as NDJSON while the file is being scanned.
+    """
+    filepath = get_log_path(alias)
+    if filepath is None:
         return {"error": "Log alias not found", "matches": []}
 
-    filepath = logs[alias]
-
     if not os.path.exists(filepath):
         return {"error": "Log file not found", "matches": []}
 
-    q = (q or "").strip()
-    if not q:
+    terms = [term.strip() for term in q if term.strip()]
+    level_list = [lvl.strip() for lvl in levels.split(",") if lvl.strip()]
+    if not terms and not level_list and not where.strip():
         return {"error": "Search query cannot be empty", "matches": []}
 
+    field_filter = None
+    if where.strip():
+        try:
+            field_filter = await run_io(build_field_filter, alias, filepath, where)
+        except ValueError as e:
+            return {"error": str(e), "matches": []}
+        except asyncio.TimeoutError:
+            return {"error": "Timed out reading log file", "matches": []}
+
+    try:
+        query = SearchQuery(terms, match_all=(mode == "all"), regex=regex, case_sensitive=case,
+                            levels=level_list, where=field_filter)
+    except re.error as e:
+        return {"error": f"Invalid regex: {e}", "matches": []}
+
     limit = max(1, min(limit, 1000))
-    matches = search_file_lines(filepath, q, limit=limit)
+    try:
+        index = await run_io(prepare_search_index, alias, filepath)
+    except asyncio.TimeoutError:
+        index = None
+    if stream:
+        return StreamingResponse(stream_search_results(filepath, query, limit, index), media_type="application/x-ndjson")
+
+    cancel = threading.Event()
+    try:
+        matches = await run_io(search_file_lines, filepath, query, limit, cancel, index,
+                               request=request, cancel=cancel, timeout=SEARCH_TIMEOUT, executor=search_pool)
+    except asyncio.TimeoutError:
+        return {"error": "Search timed out", "matches": []}
+    except Exception as e:
+        return {"error": f"Search failed: {e}", "matches": []}
+    if matches is None:
+        return {"error": "Client disconnected", "matches": []}
 
     return {
-        "query": q,
+        "query": " ".join(terms),
         "matches": matches,
         "count": len(matches),
         "limit": limit,
@@ -222,91 +437,201 @@ async def search_log(alias: str, q: str, limit: int = 200):
 @app.get("/api/logs/{alias}/download")
 async def download_log(alias: str):
     """Download the full monitored log file for the given alias."""
-    logs = load_tracked_logs()
-
-    if alias not in logs:
+    filepath = get_log_path(alias)
+    if filepath is None:
         return {"error": "Log alias not found"}
 
-    filepath = logs[alias]
-
     if not os.path.exists(filepath):
         return {"error": "Log file not found"}
 
     filename = Path(filepath).name or f"{alias}.log"
     return FileResponse(filepath, filename=filename, media_type="text/plain")
 
+
+@app.get("/api/stats")
+async def get_stats():
+    """Expose cache counters so repeated page fetches can be verified as cheap"""
+    return {"line_counts": dict(line_count_stats), "page_cache": page_cache.stats()}
+
+
+@app.get("/api/health")
+async def get_health(project: str = "", workers: int = CHECK_WORKERS, timeout: float = CHECK_TIMEOUT):
+    """Existence, readability, size, last write and growth of every tracked log (or one project's)"""
+    logs = load_tracked_logs()
+    if project:
+        logs = {alias: path for alias, path in logs.items() if parse_alias(alias)[0] == project}
+    workers = max(1, min(workers, 256))
+    try:
+        results = await run_io(check_logs, logs, workers, timeout, timeout=SEARCH_TIMEOUT)
+    except asyncio.TimeoutError:
+        return {"error": "Health check timed out", "logs": []}
+    return {"summary": summarize(results), "logs": results}
+
+
+async def send_frame(ws: WebSocket, frame):
+    """Send a pre-serialized frame: str as text, bytes (binary protocol) as binary"""
+    if isinstance(frame, bytes):
+        await ws.send_bytes(frame)
+    else:
+        await ws.send_text(frame)
+
+
+async def send_live_frames(ws: WebSocket, sub):
+    """Forward pre-serialized tail frames to one client, honoring its pause state and credits"""
+    try:
+        while True:
+            await sub.wait_writable()
+            frame, line_count = await sub.get()
+            # The client may have paused while we were waiting for a frame
+            await sub.wait_writable()
+            if sub.skipped:
+                skipped, sub.skipped = sub.skipped, 0
+                await ws.send_text(json.dumps({"type": "skipped", "lines": skipped}))
+            await send_frame(ws, frame)
+            if line_count:
+                # Only line batches cost a credit; the client returns one per batch
+                sub.sent()
+    except Exception:
+        # Disconnects are handled by the receive loop in websocket_endpoint
+        pass
+
+
+def build_live_filter(msg, profile=None):
+    """Return (SearchQuery or None, key) for a filter message.
+
+    Takes the same options as the search API: q (a string or a list of
+    terms), mode=any|all, regex, case, levels (a list or "ERROR,WARN") and
+    where (field conditions, parsed with the log's profile). Raises
+    re.error for a bad regex and ValueError for a bad where.
+    """
+    q = msg.get("q") or []
+    terms = [t.strip() for t in ([q] if isinstance(q, str) else q) if str(t).strip()]
+    levels = msg.get("levels") or []
+    if isinstance(levels, str):
+        levels = levels.split(",")
+    level_list = [lvl.strip().upper() for lvl in levels if lvl.strip()]
+    where = str(msg.get("where") or "").strip()
+    if not terms and not level_list and not where:
+        return None, None
+    field_filter = None
+    if where:
+        if profile is None:
+            raise ValueError("No parser profile matches this log")
+        field_filter = FieldFilter(where, profile)
+    match_all = msg.get("mode") == "all"
+    regex = bool(msg.get("regex"))
+    case = bool(msg.get("case"))
+    query = SearchQuery(terms, match_all=match_all, regex=regex, case_sensitive=case,
+                        levels=level_list, where=field_filter)
+    return query, (tuple(terms), match_all, regex, case, tuple(sorted(level_list)), where)
+
+
+def handle_control_message(sub, text, profile=None):
+    """Apply a client control message (pause, resume, credit, filter); returns a reply frame or None"""
+    try:
+        msg = json.loads(text)
+        kind = msg.get("type")
+        if kind == "pause":
+            sub.pause()
+        elif kind == "resume":
+            sub.resume()
+        elif kind == "credit":
+            sub.grant(int(msg.get("frames", 0)))
+        elif kind == "filter":
+            try:
+                query, key = build_live_filter(msg, profile)
+            except re.error as e:
+                return json.dumps({"type": "filter", "active": sub.query is not None, "error": f"Invalid regex: {e}"})
+            except ValueError as e:
+                return json.dumps({"type": "filter", "active": sub.query is not None, "error": str(e)})
+            sub.set_filter(query, key)
+            return json.dumps({"type": "filter", "active": query is not None})
+    except:
+        pass
+    return None
+
+
 @app.websocket("/ws/{alias}")
-async def websocket_endpoint(ws: WebSocket, alias: str):
+async def websocket_endpoint(ws: WebSocket, alias: str, proto: str = "json"):
+    """Stream the tail, then live lines. proto=bin|binz opts into binary log batches"""
+    if proto not in PROTOCOLS:
+        proto = "json"
+    if proto == "binz" and "permessage-deflate" in ws.headers.get("sec-websocket-extensions", ""):
+        # uvicorn negotiates permessage-deflate when offered; don't compress twice
+        proto = "bin"
     await ws.accept()
-    logs = load_tracked_logs()
-    
-    if alias not in logs:
+    filepath = get_log_path(alias)
+    if filepath is None:
         await ws.send_text(json.dumps({"type": "sys", "msg": f"Error: {alias} not found"}))
         await ws.close()
         return
-
-    filepath = logs[alias]
     
     # Generate dummy file if missing (for testing)
     if not os.path.exists(filepath):
         with open(filepath, "w") as f: f.write("[System] Log file created.\n")
 
     try:
-        # Get file metadata
-        metadata = get_file_metadata(filepath)
+        # Get file metadata and the last 500 lines
+        try:
+            metadata = await run_io(get_file_metadata, filepath)
+            asyncio.get_running_loop().run_in_executor(io_pool, remember_file_metadata, alias, filepath, metadata)
+            history_lines, history_start = await run_io(tail_file_lines, filepath, 500)
+            profile = await run_io(find_log_profile, alias, filepath)
+            # Viewers usually search next; get the index ready meanwhile
+            asyncio.get_running_loop().run_in_executor(io_pool, schedule_search_index, alias, filepath)
+        except asyncio.TimeoutError:
+            await ws.send_text(json.dumps({"type": "sys", "msg": "Error: timed out reading log file"}))
+            await ws.close()
+            return
         await ws.send_text(json.dumps({
             "type": "metadata",
             "size": metadata["size"],
             "lines": metadata["lines"],
-            "size_human": metadata["size_human"]
+            "size_human": metadata["size_human"],
+            "start_line": history_start,
+            "profile": profile.name if profile else None
         }))
         
-        # Get last 500 lines efficiently
-        history_lines = tail_file_lines(filepath, n=500)
-        history_lines = [line.rstrip() for line in history_lines]
-        
         # Send history in chunks
         chunk_size = 200
         for i in range(0, len(history_lines), chunk_size):
             chunk = history_lines[i:i + chunk_size]
-            await ws.send_text(json.dumps({"type": "log_batch", "data": chunk}))
+            await send_frame(ws, encode_batch(chunk, proto))
             await asyncio.sleep(0)  # Yield control
         
-        # Open file for live tailing
-        with open(filepath, "r", errors='replace') as f:
-            # Seek to end for live tailing
-            f.seek(0, 2)
-
-            # Marker
+        # Live lines come from the shared per-file tailer
+        settings = get_alias_settings(alias)
+        hub = get_tail_hub(
+            filepath,
+            batch_lines=settings.get("batch_lines", BATCH_LINES),
+            batch_interval=settings.get("batch_interval", BATCH_INTERVAL),
+            executor=io_pool
+        )
+        sub = hub.subscribe(protocol=proto)
+        sender = None
+        try:
+            # Marker; hub frames queue until it is out, so clients only see them after it
             await ws.send_text(json.dumps({"type": "sys", "msg": "__LIVE_START__"}))
+            sender = asyncio.create_task(send_live_frames(ws, sub))
 
-            # Live Tailing with Batching
-            live_buffer = []
-            batch_interval = 0.3  # 300ms batching for better performance
-            last_send = asyncio.get_event_loop().time()
-            
             while True:
-                line = f.readline()
-                if line:
-                    live_buffer.append(line.rstrip())
-                    
-                    # Send batch if buffer is large or time elapsed
-                    current_time = asyncio.get_event_loop().time()
-                    if len(live_buffer) >= 50 or (current_time - last_send) >= batch_interval:
-                        await ws.send_text(json.dumps({"type": "log_batch", "data": live_buffer}))
-                        live_buffer = []
-                        last_send = current_time
-                else:
-                    # No new lines - send any pending buffer and wait
-                    if live_buffer:
-                        await ws.send_text(json.dumps({"type": "log_batch", "data": live_buffer}))
-                        live_buffer = []
-                        last_send = asyncio.get_event_loop().time()
-                    await asyncio.sleep(0.1)
+                message = await ws.receive()
+                if message["type"] == "websocket.disconnect":
+                    raise WebSocketDisconnect(message.get("code", 1000))
+                if message.get("text"):
+                    reply = handle_control_message(sub, message["text"], profile)
+                    if reply is not None:
+                        await ws.send_text(reply)
+        finally:
+            if sender is not None:
+                sender.cancel()
+            hub.unsubscribe(sub)
 
     except WebSocketDisconnect:
         print(f"Client disconnected: {alias}")
 
-def start(port: int = 9200, host: str = "0.0.0.0"):
+def start(port: int = 9200, host: str = "0.0.0.0", search_workers: int = 0):
     import uvicorn
+    if search_workers > 0:
+        log_search.SEARCH_WORKERS = search_workers
     uvicorn.run("ezlog:app", host=host, port=port, reload=False)
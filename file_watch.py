@@ -0,0 +1,154 @@
+import os
+import sys
+import struct
+import asyncio
+import ctypes
+import ctypes.util
+
+# inotify(7) constants
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_MOVE_SELF = 0x00000800
+IN_DELETE_SELF = 0x00000400
+IN_IGNORED = 0x00008000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+# IN_ATTRIB catches unlink while we still hold the file open (DELETE_SELF waits for close)
+WATCH_MASK = IN_MODIFY | IN_ATTRIB | IN_MOVE_SELF | IN_DELETE_SELF
+_EVENT = struct.Struct("iIII")  # wd, mask, cookie, name length
+
+# Even with inotify, wake up now and then so a replaced path is noticed
+SAFETY_INTERVAL = 2.0
+
+# Polling fallback: back off from MIN to MAX while the file stays idle
+POLL_MIN_INTERVAL = 0.05
+POLL_MAX_INTERVAL = 1.0
+
+
+def _load_libc():
+    if not sys.platform.startswith("linux"):
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        libc.inotify_init1.argtypes = [ctypes.c_int]
+        libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        libc.inotify_rm_watch.argtypes = [ctypes.c_int, ctypes.c_int]
+        return libc
+    except (OSError, AttributeError):
+        return None
+
+
+_libc = _load_libc()
+
+
+class Inotify:
+    """One inotify descriptor per event loop, shared by every watch"""
+
+    def __init__(self, loop):
+        self.loop = loop
+        self.fd = _libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.watches = {}  # wd -> set of InotifyWatch
+        loop.add_reader(self.fd, self._read_events)
+
+    def add(self, watch):
+        wd = _libc.inotify_add_watch(self.fd, os.fsencode(watch.filepath), WATCH_MASK)
+        if wd < 0:
+            raise OSError(ctypes.get_errno(), f"inotify_add_watch failed for {watch.filepath}")
+        self.watches.setdefault(wd, set()).add(watch)
+        return wd
+
+    def remove(self, watch):
+        watchers = self.watches.get(watch.wd)
+        if watchers is None:
+            return
+        watchers.discard(watch)
+        if not watchers:
+            del self.watches[watch.wd]
+            _libc.inotify_rm_watch(self.fd, watch.wd)
+
+    def _read_events(self):
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return
+        pos = 0
+        while pos + _EVENT.size <= len(data):
+            wd, mask, _, name_len = _EVENT.unpack_from(data, pos)
+            pos += _EVENT.size + name_len
+            for watch in list(self.watches.get(wd, ())):
+                watch.event.set()
+            if mask & IN_IGNORED:
+                # The kernel dropped the watch (file deleted or unmounted)
+                self.watches.pop(wd, None)
+
+
+_inotify = None
+
+
+def _get_inotify():
+    global _inotify
+    loop = asyncio.get_running_loop()
+    if _libc is None:
+        return None
+    if _inotify is None or _inotify.loop is not loop:
+        try:
+            _inotify = Inotify(loop)
+        except OSError:
+            return None
+    return _inotify
+
+
+class InotifyWatch:
+    """Wakes the tailer on IN_MODIFY / IN_MOVE_SELF / IN_DELETE_SELF"""
+
+    def __init__(self, inotify, filepath):
+        self.inotify = inotify
+        self.filepath = filepath
+        self.event = asyncio.Event()
+        self.wd = inotify.add(self)
+
+    async def wait(self):
+        try:
+            await asyncio.wait_for(self.event.wait(), SAFETY_INTERVAL)
+        except asyncio.TimeoutError:
+            pass
+        self.event.clear()
+
+    def reset(self):
+        pass
+
+    def close(self):
+        self.inotify.remove(self)
+
+
+class PollingWatch:
+    """Fallback for platforms without inotify: sleep with adaptive backoff"""
+
+    def __init__(self, filepath):
+        self.filepath = filepath
+        self.delay = POLL_MIN_INTERVAL
+
+    async def wait(self):
+        await asyncio.sleep(self.delay)
+        self.delay = min(self.delay * 2, POLL_MAX_INTERVAL)
+
+    def reset(self):
+        """Call after new data was read so the next wait is short again"""
+        self.delay = POLL_MIN_INTERVAL
+
+    def close(self):
+        pass
+
+
+def watch_file(filepath):
+    """Return a watch for filepath; must be called from the running event loop"""
+    inotify = _get_inotify()
+    if inotify is not None:
+        try:
+            return InotifyWatch(inotify, filepath)
+        except OSError:
+            pass
+    return PollingWatch(filepath)
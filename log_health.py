@@ -0,0 +1,168 @@
+import os
+import json
+import time
+import queue
+import threading
+
+from tracked_logs import APP_DIR, write_json_atomic
+
+# Last size seen per path, used to report growth between two checks
+HEALTH_SAMPLES_FILE = APP_DIR / "health_samples.json"
+
+CHECK_WORKERS = 32
+CHECK_TIMEOUT = 5.0  # seconds a single stat/open may take before it is reported as timed out
+
+# Statuses that mean the path is gone (what `ezlog prune` removes)
+MISSING_STATUSES = ("missing", "not_a_file")
+
+
+def human_size(size):
+    if size < 1024:
+        return f"{size} B"
+    elif size < 1024 * 1024:
+        return f"{size / 1024:.1f} KB"
+    elif size < 1024 * 1024 * 1024:
+        return f"{size / (1024 * 1024):.1f} MB"
+    return f"{size / (1024 * 1024 * 1024):.2f} GB"
+
+
+def check_path(path):
+    """Stat one log file and try to open it; never raises"""
+    result = {"path": path, "status": "ok", "size": None, "mtime": None, "inode": None, "readable": False}
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        result["status"] = "missing"
+        return result
+    except OSError as e:
+        result["status"] = "error"
+        result["error"] = str(e)
+        return result
+
+    if not os.path.isfile(path):
+        result["status"] = "not_a_file"
+        return result
+
+    result.update(size=st.st_size, mtime=st.st_mtime, inode=st.st_ino)
+    try:
+        # os.access lies on some network filesystems; opening is the real test
+        with open(path, "rb"):
+            result["readable"] = True
+    except OSError:
+        result["status"] = "unreadable"
+    return result
+
+
+def load_samples():
+    try:
+        with open(HEALTH_SAMPLES_FILE, "r") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_samples(results, checked_at):
+    samples = load_samples()
+    for r in results:
+        if r["size"] is not None:
+            samples[r["path"]] = [r["size"], r["inode"], checked_at]
+    try:
+        write_json_atomic(HEALTH_SAMPLES_FILE, samples)
+    except OSError:
+        pass
+
+
+def _growth(result, sample, now):
+    """Bytes per second since the previous check, or None if unknown or the file was replaced"""
+    if not sample or result["size"] is None:
+        return None
+    size, inode, checked_at = sample
+    if inode != result["inode"] or result["size"] < size or now <= checked_at:
+        return None
+    return (result["size"] - size) / (now - checked_at)
+
+
+def _timed_out(path):
+    return {"path": path, "status": "timeout", "size": None, "mtime": None, "inode": None, "readable": False}
+
+
+def check_logs(logs: dict, workers=CHECK_WORKERS, timeout=CHECK_TIMEOUT, save=True):
+    """Check every alias -> path concurrently; returns one result dict per alias, in input order.
+
+    Each check gets ``timeout`` seconds once it starts running. A check
+    still blocked after that (e.g. a hung NFS mount) is reported as
+    "timeout" and left behind on its daemon thread, so it can't keep the
+    process alive. If every worker is stuck, the checks still queued are
+    reported as "timeout" as well.
+    """
+    now = time.time()
+    samples = load_samples()
+    paths = sorted(set(logs.values()))
+    tasks = queue.Queue()
+    for path in paths:
+        tasks.put(path)
+    finished = queue.Queue()
+    running = {}  # path -> monotonic start time
+    lock = threading.Lock()
+
+    def worker():
+        while True:
+            try:
+                path = tasks.get_nowait()
+            except queue.Empty:
+                return
+            with lock:
+                running[path] = time.monotonic()
+            result = check_path(path)
+            with lock:
+                running.pop(path, None)
+            finished.put(result)
+
+    threads = [
+        threading.Thread(target=worker, name="ezlog-health", daemon=True)
+        for _ in range(max(1, min(workers, len(paths))))
+    ]
+    for t in threads:
+        t.start()
+
+    by_path = {}
+    while len(by_path) < len(paths):
+        try:
+            result = finished.get(timeout=min(timeout, 0.2))
+            by_path.setdefault(result["path"], result)
+            continue
+        except queue.Empty:
+            pass
+
+        clock = time.monotonic()
+        with lock:
+            stuck = [path for path, t0 in running.items() if clock - t0 > timeout]
+        for path in stuck:
+            by_path.setdefault(path, _timed_out(path))
+        if len(stuck) >= sum(1 for t in threads if t.is_alive()):
+            # Every live worker is blocked; whatever is still queued will never start
+            while True:
+                try:
+                    path = tasks.get_nowait()
+                except queue.Empty:
+                    break
+                by_path.setdefault(path, _timed_out(path))
+
+    results = []
+    for alias, path in logs.items():
+        r = dict(by_path[path], alias=alias)
+        r["growth_bytes_per_sec"] = _growth(r, samples.get(path), now)
+        r["checked_at"] = now
+        results.append(r)
+
+    if save:
+        save_samples(results, now)
+    return results
+
+
+def summarize(results):
+    """Count results per status, e.g. {"total": 3, "ok": 2, "missing": 1}"""
+    summary = {"total": len(results)}
+    for r in results:
+        summary[r["status"]] = summary.get(r["status"], 0) + 1
+    return summary
@@ -0,0 +1,315 @@
+import os
+import struct
+import hashlib
+import threading
+from array import array
+from bisect import bisect_left, bisect_right
+
+from tracked_logs import APP_DIR
+from log_reader import get_shared_file, readable_size, read_lines, decode_line
+from log_time import line_time, scan_for_time, last_time
+
+# Persisted indexes live next to tracked_logs.json
+INDEX_DIR = APP_DIR / "index"
+
+CHECKPOINT_BYTES = 64 * 1024          # record a line start roughly every 64 KB
+READ_CHUNK = 1024 * 1024              # bytes read per step while indexing
+TAIL_BLOCK = 64 * 1024                # bytes read per step walking back from EOF
+SAVE_EVERY_BYTES = 16 * 1024 * 1024   # persist again after this much new data
+HEAD_BYTES = 64                       # file prefix used to detect replaced files
+
+_MAGIC = b"EZLI"
+_VERSION = 2
+# magic, version, dev, ino, indexed_size, newlines, checkpoints, head length, timestamps
+_HEADER = struct.Struct("<4sIQQQQQHQ")
+
+
+def index_path_for(filepath):
+    """Return the on-disk index location for a log file"""
+    digest = hashlib.sha1(os.path.abspath(filepath).encode("utf-8", "surrogateescape")).hexdigest()
+    return INDEX_DIR / f"{digest}.idx"
+
+
+class LineIndex:
+    """Sparse line-offset index of a single log file.
+
+    ``offsets[i]`` is the byte offset where line ``lines[i] + 1`` starts.
+    A checkpoint is recorded at the first line boundary after every
+    CHECKPOINT_BYTES, so locating any line costs one seek plus a short
+    forward skip. Only newline-terminated data is indexed; a trailing
+    partial line is picked up on the next refresh.
+
+    Checkpoint lines that start with a timestamp are also sampled:
+    ``time_keys[j]`` is the timestamp of checkpoint ``time_points[j]``,
+    which makes "jump to time" a bisect plus one short scan.
+    """
+
+    def __init__(self, filepath):
+        self.filepath = filepath
+        self.lock = threading.Lock()
+        # Bumped on every reset so caches can tell a rewritten file apart
+        self.generation = 0
+        self._reset(0, 0)
+        # Fresh indexes are persisted once they cover SAVE_EVERY_BYTES
+        self.saved_size = 0
+
+    def _reset(self, dev, ino):
+        self.generation += 1
+        self.dev = dev
+        self.ino = ino
+        self.head = b""
+        self.file_size = 0
+        self.indexed_size = 0
+        self.newlines = 0
+        self.offsets = array("Q", [0])
+        self.lines = array("Q", [0])
+        self.time_keys = array("d")
+        self.time_points = array("Q")
+        self.time_sorted = True
+        self.saved_size = -1
+
+    @property
+    def total_lines(self):
+        """Line count including a trailing line without a newline"""
+        return self.newlines + (1 if self.file_size > self.indexed_size else 0)
+
+    def refresh(self):
+        """Extend the index to the current end of file, rebuilding after rotation or truncation"""
+        with self.lock:
+            st = os.stat(self.filepath)
+            with open(self.filepath, "rb") as f:
+                if (
+                    (st.st_dev, st.st_ino) != (self.dev, self.ino)
+                    or st.st_size < self.indexed_size
+                    or f.read(len(self.head)) != self.head
+                ):
+                    self._reset(st.st_dev, st.st_ino)
+                self.file_size = st.st_size
+                if st.st_size > self.indexed_size:
+                    self._extend(f, st.st_size)
+
+            if self.saved_size < 0 or self.indexed_size - self.saved_size >= SAVE_EVERY_BYTES:
+                self.save()
+        return self
+
+    def _add_time(self, checkpoint, key):
+        if key is None:
+            return
+        if self.time_keys and key < self.time_keys[-1]:
+            self.time_sorted = False
+        self.time_keys.append(key)
+        self.time_points.append(checkpoint)
+
+    def _extend(self, f, size):
+        base = self.indexed_size
+        f.seek(base)
+        next_checkpoint = self.offsets[-1] + CHECKPOINT_BYTES
+
+        while base < size:
+            data = f.read(min(READ_CHUNK, size - base))
+            if not data:
+                break
+            if base == 0 and not self.time_points:
+                self._add_time(0, line_time(data, 0))
+
+            last = data.rfind(b"\n")
+            if last >= 0:
+                counted = 0
+                counted_pos = 0
+                while next_checkpoint <= base + last:
+                    nl = data.find(b"\n", max(0, next_checkpoint - base))
+                    counted += data.count(b"\n", counted_pos, nl + 1)
+                    counted_pos = nl + 1
+                    offset = base + nl + 1
+                    self.offsets.append(offset)
+                    self.lines.append(self.newlines + counted)
+                    self._add_time(len(self.offsets) - 1, line_time(data, nl + 1))
+                    next_checkpoint = offset + CHECKPOINT_BYTES
+
+                self.newlines += counted + data.count(b"\n", counted_pos, last + 1)
+                self.indexed_size = base + last + 1
+
+            base += len(data)
+
+        if len(self.head) < HEAD_BYTES:
+            f.seek(0)
+            self.head = f.read(min(HEAD_BYTES, self.indexed_size))
+
+    def locate(self, line_no):
+        """Return (offset, lines_to_skip) for reading from 1-indexed line_no"""
+        target = max(0, line_no - 1)
+        with self.lock:
+            i = bisect_right(self.lines, target) - 1
+            return self.offsets[i], target - self.lines[i]
+
+    def line_of(self, offset):
+        """1-indexed number of the line containing byte offset (the next line if offset starts one)"""
+        with self.lock:
+            i = bisect_right(self.offsets, offset) - 1
+            start, line = self.offsets[i], self.lines[i]
+        buf = get_shared_file(self.filepath).snapshot()
+        # Checkpoints are ~CHECKPOINT_BYTES apart, so the copied slice stays small
+        return line + buf[start:min(offset, readable_size(buf))].count(b"\n") + 1
+
+    def find_time(self, key):
+        """Byte offset of the first line stamped at or after timestamp key (EOF if none).
+
+        Bisects the sampled checkpoint times and scans at most one
+        checkpoint gap. Without usable samples (none, or timestamps that
+        go backwards so bisecting would be wrong) it scans from the start.
+        """
+        buf = get_shared_file(self.filepath).snapshot()
+        with self.lock:
+            size = min(self.file_size, readable_size(buf))
+            if not self.time_keys or not self.time_sorted:
+                start = 0
+            else:
+                i = bisect_left(self.time_keys, key)
+                start = self.offsets[self.time_points[i - 1]] if i else 0
+        return scan_for_time(buf, start, size, key)
+
+    def last_time(self):
+        """Timestamp key of the last stamped line near EOF, or None"""
+        buf = get_shared_file(self.filepath).snapshot()
+        with self.lock:
+            size = min(self.file_size, readable_size(buf))
+        return last_time(buf, size)
+
+    def read_lines(self, start_line, count):
+        """Read count lines starting at 1-indexed start_line"""
+        if count <= 0:
+            return []
+        offset, skip = self.locate(start_line)
+        buf = get_shared_file(self.filepath).snapshot()
+        # Only the returned lines are decoded
+        return read_lines(buf, offset, count, skip)
+
+    def tail(self, n):
+        """Return (lines, start_line) for the last n lines, reading blocks backwards from EOF"""
+        buf = get_shared_file(self.filepath).snapshot()
+        with self.lock:
+            size = min(self.file_size, readable_size(buf))
+            total = self.total_lines
+        if n <= 0 or size == 0:
+            return [], total + 1
+
+        end = size
+        if buf[end - 1:end] == b"\n":
+            # The final newline terminates the last line; it doesn't start a new one
+            end -= 1
+        blocks = []
+        newlines = 0
+        pos = end
+        while pos > 0 and newlines < n:
+            start = max(0, pos - TAIL_BLOCK)
+            data = buf[start:pos]
+            blocks.append(data)
+            newlines += data.count(b"\n")
+            pos = start
+
+        # With n newlines found, the first piece is cut off and drops out of the last n
+        pieces = b"".join(reversed(blocks)).split(b"\n")[-n:]
+        lines = [decode_line(piece) for piece in pieces]
+        return lines, total - len(lines) + 1
+
+    def save(self):
+        """Atomically write the index under INDEX_DIR"""
+        target = index_path_for(self.filepath)
+        try:
+            INDEX_DIR.mkdir(parents=True, exist_ok=True)
+            tmp = target.with_suffix(f".{os.getpid()}.tmp")
+            with open(tmp, "wb") as f:
+                f.write(_HEADER.pack(
+                    _MAGIC, _VERSION, self.dev, self.ino, self.indexed_size,
+                    self.newlines, len(self.offsets), len(self.head), len(self.time_keys)
+                ))
+                f.write(self.head)
+                f.write(self.offsets.tobytes())
+                f.write(self.lines.tobytes())
+                f.write(self.time_keys.tobytes())
+                f.write(self.time_points.tobytes())
+            os.replace(tmp, target)
+            self.saved_size = self.indexed_size
+        except OSError:
+            # The index is only a cache; a read-only home dir must not break viewing
+            self.saved_size = self.indexed_size
+
+    @classmethod
+    def load(cls, filepath):
+        """Load a persisted index, or return an empty one if none is usable"""
+        index = cls(filepath)
+        try:
+            with open(index_path_for(filepath), "rb") as f:
+                header = f.read(_HEADER.size)
+                magic, version, dev, ino, indexed_size, newlines, checkpoints, head_len, stamped = _HEADER.unpack(header)
+                if magic != _MAGIC or version != _VERSION:
+                    return index
+                head = f.read(head_len)
+                offsets = array("Q")
+                lines = array("Q")
+                time_keys = array("d")
+                time_points = array("Q")
+                offsets.fromfile(f, checkpoints)
+                lines.fromfile(f, checkpoints)
+                time_keys.fromfile(f, stamped)
+                time_points.fromfile(f, stamped)
+        except (OSError, struct.error, EOFError):
+            return index
+
+        index.dev, index.ino = dev, ino
+        index.head = head
+        index.indexed_size = indexed_size
+        index.file_size = indexed_size
+        index.newlines = newlines
+        index.offsets = offsets
+        index.lines = lines
+        index.time_keys = time_keys
+        index.time_points = time_points
+        index.time_sorted = all(a <= b for a, b in zip(time_keys, time_keys[1:]))
+        index.saved_size = indexed_size
+        return index
+
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+def get_line_index(filepath):
+    """Return the up-to-date line index for filepath (shared per process)"""
+    key = os.path.abspath(filepath)
+    with _indexes_lock:
+        index = _indexes.get(key)
+        if index is None:
+            index = LineIndex.load(key)
+            _indexes[key] = index
+    return index.refresh()
+
+
+_line_counts = {}
+_line_counts_lock = threading.Lock()
+# hits: file unchanged; incremental: only appended bytes counted; full: counted from byte 0
+line_count_stats = {"hits": 0, "misses": 0, "incremental": 0, "full": 0}
+
+
+def get_line_count(filepath, st=None):
+    """Return the number of lines in filepath, cached by (path, inode, mtime, size)"""
+    key = os.path.abspath(filepath)
+    if st is None:
+        st = os.stat(key)
+    identity = (st.st_ino, st.st_mtime_ns, st.st_size)
+
+    with _line_counts_lock:
+        cached = _line_counts.get(key)
+        if cached and cached[0] == identity:
+            line_count_stats["hits"] += 1
+            return cached[1]
+        line_count_stats["misses"] += 1
+        if cached and cached[0][0] == st.st_ino and cached[0][2] <= st.st_size:
+            line_count_stats["incremental"] += 1
+        else:
+            line_count_stats["full"] += 1
+
+    lines = get_line_index(key).total_lines
+    with _line_counts_lock:
+        _line_counts[key] = (identity, lines)
+    return lines
@@ -0,0 +1,254 @@
+import os
+import re
+import json
+import shlex
+import threading
+
+from tracked_logs import APP_DIR
+from log_index import get_line_index
+
+# User-defined regex profiles: {"name": {"pattern": "..."}} with named groups
+PARSERS_FILE = APP_DIR / "parsers.json"
+
+# Lines sampled from the head of a file to auto-detect its profile
+DETECT_LINES = 20
+
+_LEVEL_KEYS = ("level", "lvl", "severity", "loglevel")
+_TS_KEYS = ("ts", "time", "timestamp", "@timestamp")
+
+
+def _normalize(fields):
+    """Fill in the common ts/level fields from whatever keys the format uses"""
+    if "level" not in fields:
+        for key in _LEVEL_KEYS:
+            if key in fields:
+                fields["level"] = fields[key]
+                break
+    if "level" in fields:
+        fields["level"] = str(fields["level"]).upper()
+    if "ts" not in fields:
+        for key in _TS_KEYS:
+            if key in fields:
+                fields["ts"] = fields[key]
+                break
+    return fields
+
+
+class RegexProfile:
+    """Lines matched by one pre-compiled regex; its named groups become fields"""
+
+    def __init__(self, name, pattern):
+        self.name = name
+        self.regex = re.compile(pattern)
+
+    def parse(self, line):
+        m = self.regex.match(line)
+        if m is None:
+            return None
+        return _normalize({k: v for k, v in m.groupdict().items() if v is not None})
+
+
+class LogfmtProfile:
+    """key=value pairs, optionally after a "[timestamp]" prefix"""
+
+    name = "logfmt"
+    _PREFIX = re.compile(r"\[([^\]]+)\]\s*")
+    _PAIR = re.compile(r'([\w.@-]+)=("(?:[^"\\]|\\.)*"|\S*)')
+
+    def parse(self, line):
+        fields = {}
+        m = self._PREFIX.match(line)
+        if m:
+            fields["ts"] = m.group(1)
+        for key, value in self._PAIR.findall(line):
+            if value.startswith('"'):
+                value = value[1:-1].replace('\\"', '"')
+            fields[key] = value
+        if len(fields) < 2:
+            return None
+        return _normalize(fields)
+
+
+class JsonProfile:
+    """One JSON object per line; top-level values become fields"""
+
+    name = "json"
+
+    def parse(self, line):
+        if not line.startswith("{"):
+            return None
+        try:
+            data = json.loads(line)
+        except ValueError:
+            return None
+        if not isinstance(data, dict):
+            return None
+        return _normalize({k: v for k, v in data.items() if not isinstance(v, (dict, list))})
+
+
+BUILTIN_PROFILES = {
+    # "2024-01-01 12:00:00,123 [ERROR] [api] message" (generate_dummy_logs.py)
+    "standard": RegexProfile(
+        "standard",
+        r"(?P<ts>\d{4}-\d\d-\d\d[ T]\d\d:\d\d:\d\d(?:[.,]\d+)?)\s+\[(?P<level>[A-Za-z]+)\]\s+"
+        r"(?:\[(?P<service>[^\]]+)\]\s*)?(?P<msg>.*)"
+    ),
+    # "[2024-01-01 12:00:00.123] level=ERROR latency_ms=12 ..." (simple_log_simulator.py)
+    "logfmt": LogfmtProfile(),
+    "json": JsonProfile(),
+}
+
+
+_profiles = (None, None)  # (parsers.json identity, profiles)
+_profiles_lock = threading.Lock()
+
+
+def load_profiles() -> dict:
+    """Built-in profiles plus the regex profiles defined in ~/.ezlog/parsers.json.
+
+    Cached until parsers.json gets a new inode, mtime or size; the
+    returned dict is shared and must not be modified.
+    """
+    global _profiles
+    try:
+        st = os.stat(PARSERS_FILE)
+        identity = (st.st_ino, st.st_mtime_ns, st.st_size)
+    except OSError:
+        identity = None
+    with _profiles_lock:
+        if _profiles[1] is not None and _profiles[0] == identity:
+            return _profiles[1]
+
+    profiles = dict(BUILTIN_PROFILES)
+    try:
+        with open(PARSERS_FILE, "r") as f:
+            custom = json.load(f)
+    except (OSError, ValueError):
+        custom = {}
+    for name, spec in custom.items():
+        try:
+            profiles[name] = RegexProfile(name, spec["pattern"])
+        except (KeyError, TypeError, re.error):
+            pass
+    with _profiles_lock:
+        _profiles = (identity, profiles)
+    return profiles
+
+
+def detect_profile(lines, profiles=None):
+    """Pick the profile that parses most of the sample lines (at least half), or None"""
+    profiles = profiles or load_profiles()
+    sample = [line for line in lines if line.strip()]
+    if not sample:
+        return None
+    best, best_hits = None, 0
+    for profile in profiles.values():
+        hits = sum(1 for line in sample if profile.parse(line) is not None)
+        if hits > best_hits:
+            best, best_hits = profile, hits
+    return best if best_hits * 2 >= len(sample) else None
+
+
+_detected = {}  # path -> ((dev, ino), profile name or None)
+_detected_lock = threading.Lock()
+
+
+def get_profile(filepath, name="auto"):
+    """Return the parser profile for a file: a named one, or auto-detected from its first lines.
+
+    Returns None for name "none" or when nothing fits; raises ValueError
+    for an unknown profile name.
+    """
+    if name == "none":
+        return None
+    profiles = load_profiles()
+    if name != "auto":
+        if name not in profiles:
+            raise ValueError(f"Unknown parser profile '{name}'")
+        return profiles[name]
+
+    st = os.stat(filepath)
+    identity = (st.st_dev, st.st_ino)
+    with _detected_lock:
+        cached = _detected.get(filepath)
+    if cached is None or cached[0] != identity:
+        profile = detect_profile(get_line_index(filepath).read_lines(1, DETECT_LINES), profiles)
+        cached = (identity, profile.name if profile else None)
+        with _detected_lock:
+            _detected[filepath] = cached
+    return profiles.get(cached[1]) if cached[1] else None
+
+
+def _number(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+class FieldFilter:
+    """Conditions on parsed fields, all of which must hold, e.g. "level=ERROR latency_ms>1000".
+
+    Operators: = and != (case-insensitive; numeric when both sides are
+    numbers), > >= < <= (numeric, or string order for timestamps) and ~
+    (substring). Raises ValueError for a condition it can't read.
+    """
+
+    _CONDITION = re.compile(r"([\w.@-]+)(!=|>=|<=|=|>|<|~)(.*)")
+
+    def __init__(self, expression, profile):
+        self.profile = profile
+        self.conditions = []
+        for token in shlex.split(expression):
+            m = self._CONDITION.fullmatch(token)
+            if m is None:
+                raise ValueError(f"Invalid field condition '{token}'")
+            field, op, value = m.groups()
+            self.conditions.append((field, op, value, _number(value)))
+        if not self.conditions:
+            raise ValueError("Field filter is empty")
+
+    def anchors(self):
+        """Values every matching line must contain (for fast raw-text pre-filtering)"""
+        # Numbers compare by value (12 = 12.0), so only text values are safe anchors
+        return [
+            value for _, op, value, number in self.conditions
+            if op in ("=", "~") and value and (op == "~" or number is None)
+        ]
+
+    def matches(self, line):
+        fields = self.profile.parse(line)
+        if fields is None:
+            return False
+        for field, op, value, number in self.conditions:
+            actual = fields.get(field)
+            if actual is None:
+                if op == "!=":
+                    continue
+                return False
+            if not _compare(actual, op, value, number):
+                return False
+        return True
+
+
+def _compare(actual, op, value, number):
+    actual_number = _number(actual)
+    if op in ("=", "!="):
+        if number is not None and actual_number is not None:
+            equal = actual_number == number
+        else:
+            equal = str(actual).lower() == value.lower()
+        return equal if op == "=" else not equal
+    if op == "~":
+        return value.lower() in str(actual).lower()
+    if number is not None and actual_number is not None:
+        left, right = actual_number, number
+    else:
+        left, right = str(actual), value
+    if op == ">":
+        return left > right
+    if op == ">=":
+        return left >= right
+    if op == "<":
+        return left < right
+    return left <= right
@@ -0,0 +1,162 @@
+import os
+import codecs
+import threading
+from collections import OrderedDict
+
+# Open files kept around for reuse (each holds a file descriptor)
+MAX_SHARED_FILES = 64
+
+FIND_WINDOW = 64 * 1024          # first window read by find()/rfind()
+MAX_FIND_WINDOW = 1024 * 1024    # windows double up to this size
+READ_CHUNK = 256 * 1024          # bytes read per step by read_lines()
+
+
+def decode_line(data):
+    """Decode one line of raw bytes"""
+    return codecs.decode(data, "utf-8", "replace").rstrip()
+
+
+def readable_size(buf):
+    """Bytes of buf the file still has (less than len(buf) after a truncation)"""
+    if isinstance(buf, FileSnapshot):
+        return min(len(buf), buf.size())
+    return len(buf)
+
+
+class FileSnapshot:
+    """Read-only view of an open log file as it was when the snapshot was taken.
+
+    Supports len(), slicing, find() and rfind() like bytes, reading with
+    pread() on demand. Unlike an mmap, a file truncated underneath only
+    makes reads come back short; it can never fault the process (SIGBUS).
+    """
+
+    def __init__(self, f, size):
+        self.file = f  # kept open for as long as a reader holds the snapshot
+        self.fd = f.fileno()
+        self.length = size
+
+    def __len__(self):
+        return self.length
+
+    def size(self):
+        """Current size of the file on disk"""
+        return os.fstat(self.fd).st_size
+
+    def read(self, start, stop):
+        """Bytes start:stop (shorter if the file was truncated)"""
+        parts = []
+        while start < stop:
+            data = os.pread(self.fd, min(stop - start, 1 << 30), start)
+            if not data:
+                break
+            parts.append(data)
+            start += len(data)
+        return parts[0] if len(parts) == 1 else b"".join(parts)
+
+    def __getitem__(self, key):
+        start, stop, _ = key.indices(self.length)
+        return self.read(start, stop)
+
+    def find(self, sub, start=0, end=None):
+        end = self.length if end is None else min(end, self.length)
+        window = FIND_WINDOW
+        pos = start
+        while pos < end:
+            stop = min(end, pos + window)
+            data = self.read(pos, stop)
+            hit = data.find(sub)
+            if hit >= 0:
+                return pos + hit
+            if stop >= end or len(data) < stop - pos:
+                break
+            # Overlap windows so a match across the boundary is not missed
+            pos = stop - len(sub) + 1
+            window = min(window * 2, MAX_FIND_WINDOW)
+        return -1
+
+    def rfind(self, sub, start=0, end=None):
+        end = self.length if end is None else min(end, self.length)
+        window = FIND_WINDOW
+        pos = end
+        while pos > start:
+            low = max(start, pos - window)
+            hit = self.read(low, pos).rfind(sub)
+            if hit >= 0:
+                return low + hit
+            if low <= start:
+                break
+            pos = low + len(sub) - 1
+            window = min(window * 2, MAX_FIND_WINDOW)
+        return -1
+
+
+def read_lines(buf, pos, count, skip=0, end=None):
+    """Decode count lines starting at byte pos (a line start), after skipping skip lines"""
+    end = len(buf) if end is None else end
+    lines = []
+    pending = b""
+    while pos < end and len(lines) < count:
+        data = buf[pos:min(end, pos + READ_CHUNK)]
+        if not data:
+            break
+        pos += len(data)
+        parts = (pending + data).split(b"\n")
+        pending = parts.pop()
+        for part in parts:
+            if skip:
+                skip -= 1
+                continue
+            lines.append(decode_line(part))
+            if len(lines) >= count:
+                return lines
+    if pending and not skip and len(lines) < count:
+        # Last line without a trailing newline
+        lines.append(decode_line(pending))
+    return lines
+
+
+class SharedFile:
+    """One open log file, reopened when the file changes size or identity.
+
+    snapshot() returns a FileSnapshot. A reader keeps using the snapshot
+    it got; the old descriptor is closed once nobody holds it.
+    """
+
+    def __init__(self, filepath):
+        self.filepath = filepath
+        self.lock = threading.Lock()
+        self.identity = None
+        self.buf = None
+
+    def snapshot(self):
+        st = os.stat(self.filepath)
+        with self.lock:
+            if (st.st_dev, st.st_ino, st.st_size) != self.identity:
+                self._reopen()
+            return self.buf
+
+    def _reopen(self):
+        f = open(self.filepath, "rb", buffering=0)
+        st = os.fstat(f.fileno())
+        self.buf = FileSnapshot(f, st.st_size)
+        self.identity = (st.st_dev, st.st_ino, st.st_size)
+
+
+_shared = OrderedDict()
+_shared_lock = threading.Lock()
+
+
+def get_shared_file(filepath):
+    """Return the SharedFile for filepath (least recently used ones are dropped)"""
+    key = os.path.abspath(filepath)
+    with _shared_lock:
+        shared = _shared.get(key)
+        if shared is None:
+            shared = SharedFile(key)
+            _shared[key] = shared
+            if len(_shared) > MAX_SHARED_FILES:
+                _shared.popitem(last=False)
+        else:
+            _shared.move_to_end(key)
+    return shared
@@ -0,0 +1,407 @@
+import os
+import re
+import threading
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, CancelledError
+from concurrent.futures.process import BrokenProcessPool
+
+from log_reader import get_shared_file
+
+SEARCH_CHUNK = 4 * 1024 * 1024   # bytes scanned per step
+
+# Files at least PARALLEL_MIN_BYTES are split into SEGMENT_BYTES ranges and
+# scanned by SEARCH_WORKERS processes (set to 1 to disable)
+SEARCH_WORKERS = min(8, os.cpu_count() or 1)
+SEGMENT_BYTES = 32 * 1024 * 1024
+PARALLEL_MIN_BYTES = 64 * 1024 * 1024
+
+
+class _Literal:
+    """Plain substring needle (bytes or str), found with memchr-speed .find()"""
+
+    def __init__(self, needle):
+        self.needle = needle
+        self.weight = len(needle)
+
+    def find(self, hay, pos, end):
+        return hay.find(self.needle, pos, end)
+
+
+class _Pattern:
+    """Compiled regular expression"""
+
+    def __init__(self, regex, weight=0):
+        self.regex = regex
+        self.weight = weight
+
+    def find(self, hay, pos, end):
+        m = self.regex.search(hay, pos, end)
+        return m.start() if m else -1
+
+
+class _EveryLine:
+    """Candidate finder that stops at every line (field filters with nothing to anchor on)"""
+
+    weight = 0
+
+    def find(self, hay, pos, end):
+        return pos if pos < end else -1
+
+
+class SearchQuery:
+    """A compiled search: one or more terms combined with AND/OR, plus level filters.
+
+    Literal ASCII terms are matched on raw bytes (lower-cased per chunk when
+    case-insensitive). Regexes, and case-insensitive terms with non-ASCII
+    characters, switch the scan to decoded text so matching stays correct.
+    An optional ``where`` (a log_parser.FieldFilter) is checked on lines that
+    pass the text conditions; when it is the only condition, the values it
+    requires pre-filter lines on the raw text so only candidates are parsed.
+    Raises re.error for an invalid regex.
+    """
+
+    def __init__(self, terms, match_all=False, regex=False, case_sensitive=False, levels=None, where=None):
+        self.terms = [t for t in terms if t]
+        self.where = where
+        self.match_all = match_all
+        self.case_sensitive = case_sensitive
+        self.levels = [lvl.upper() for lvl in (levels or []) if lvl]
+        self.text_mode = regex or (
+            not case_sensitive and any(not t.isascii() for t in self.terms)
+        )
+
+        # MULTILINE so ^ and $ anchor to each log line
+        flags = re.MULTILINE if case_sensitive else re.MULTILINE | re.IGNORECASE
+        if self.text_mode:
+            self.newline = "\n"
+            sources = self.terms if regex else [re.escape(t) for t in self.terms]
+            self.matchers = [_Pattern(re.compile(src, flags), len(src)) for src in sources]
+        else:
+            self.newline = b"\n"
+            needles = [t.encode("utf-8") for t in self.terms]
+            if not case_sensitive:
+                needles = [n.lower() for n in needles]
+            self.matchers = [_Literal(n) for n in needles]
+
+        self.anchor = max(self.matchers, key=lambda m: m.weight) if self.matchers else None
+
+        # Where-only queries: scan for the longest required value, or visit every line
+        self.where_anchor = None
+        if where is not None and not self.matchers and not self.levels:
+            anchors = [a for a in where.anchors() if not case_sensitive and a.isascii()]
+            if anchors and self.text_mode:
+                # regex=True with no terms still scans decoded text, which is not lower-cased
+                self.where_anchor = _Pattern(re.compile(re.escape(max(anchors, key=len)), re.IGNORECASE))
+            elif anchors:
+                self.where_anchor = _Literal(max(anchors, key=len).lower().encode("utf-8"))
+            else:
+                self.where_anchor = _EveryLine()
+
+        self.level_matcher = None
+        if self.levels:
+            alternatives = "|".join(re.escape(lvl) for lvl in self.levels)
+            source = rf"\b(?:{alternatives})\b"
+            regex_level = re.compile(source if self.text_mode else source.encode("ascii"))
+            self.level_matcher = _Pattern(regex_level)
+
+    @property
+    def is_empty(self):
+        return not self.matchers and self.level_matcher is None and self.where is None
+
+    def haystack(self, chunk):
+        """Return the searchable form of a newline-aligned byte chunk"""
+        if self.text_mode:
+            return chunk.decode("utf-8", errors="replace")
+        return chunk if self.case_sensitive else chunk.lower()
+
+    def _next_candidate(self, hay, raw, pos, end, cache):
+        """Offset of the next position worth checking, or -1"""
+        if self.where_anchor is not None:
+            return self.where_anchor.find(hay, pos, end)
+        if not self.matchers:
+            return self.level_matcher.find(raw, pos, end)
+        if self.match_all:
+            # Anchor on the most selective (longest) term; the rest are checked per line
+            return self.anchor.find(hay, pos, end)
+
+        # OR: earliest hit of any term, remembering each term's next hit so a
+        # rare term is not rescanned for every match of a frequent one
+        best = -1
+        for i, matcher in enumerate(self.matchers):
+            hit = cache[i]
+            if hit is None or 0 <= hit < pos:
+                hit = matcher.find(hay, pos, end)
+                cache[i] = hit
+            if hit >= 0 and (best < 0 or hit < best):
+                best = hit
+        return best
+
+    def _line_matches(self, hay, raw, start, end):
+        # Levels are matched case-sensitively on the original (not lower-cased) text
+        if self.level_matcher is not None and self.level_matcher.find(raw, start, end) < 0:
+            return False
+        if self.match_all:
+            if not all(m.find(hay, start, end) >= 0 for m in self.matchers):
+                return False
+        elif self.text_mode and self.matchers:
+            # A regex hit may run past the newline; require a match inside this line
+            if not any(m.find(hay, start, end) >= 0 for m in self.matchers):
+                return False
+        if self.where is not None:
+            text = raw[start:end]
+            if not self.text_mode:
+                text = text.decode("utf-8", errors="replace")
+            return self.where.matches(text.rstrip())
+        return True
+
+    def filter_lines(self, lines):
+        """Return (index, line) for every matching line of a list of str lines"""
+        if self.is_empty:
+            return list(enumerate(lines))
+        # Lines never contain "\n", so the batch scans like one newline-aligned chunk
+        chunk = "\n".join(lines).encode("utf-8")
+        return [(i, lines[i]) for i, _ in self.scan_chunk(chunk)]
+
+    def scan_chunk(self, chunk):
+        """Yield (line_index_in_chunk, line_text) for every matching line of a chunk"""
+        hay = self.haystack(chunk)
+        # Lower-casing bytes keeps offsets, so raw and hay positions line up
+        raw = hay if self.text_mode else chunk
+        nl = self.newline
+        size = len(hay)
+        pos = 0
+        counted = 0
+        counted_pos = 0
+        cache = [None] * len(self.matchers)
+
+        while pos < size:
+            hit = self._next_candidate(hay, raw, pos, size, cache)
+            if hit < 0:
+                break
+            start = hay.rfind(nl, 0, hit) + 1
+            end = hay.find(nl, hit)
+            if end < 0:
+                end = size
+
+            if self._line_matches(hay, raw, start, end):
+                counted += hay.count(nl, counted_pos, start)
+                counted_pos = start
+                text = raw[start:end]
+                if not self.text_mode:
+                    text = text.decode("utf-8", errors="replace")
+                yield counted, text.rstrip()
+            pos = end + 1
+
+
+def iter_matches(filepath, query, start=0, end=None, first_line=1, cancel=None, stats=None):
+    """Stream {"line", "text"} matches from filepath in line order.
+
+    Reads [start, end) of the file in SEARCH_CHUNK byte blocks cut at
+    newline boundaries; ``first_line`` is the line number at ``start``.
+    Stops early once ``cancel`` (a threading.Event) is set. When the scan
+    completes, ``stats["newlines"]`` holds the newlines it passed.
+    """
+    buf = get_shared_file(filepath).snapshot()
+    end = len(buf) if end is None else min(end, len(buf))
+    line_base = first_line
+    pos = start
+
+    while pos < end:
+        if cancel is not None and cancel.is_set():
+            return
+        chunk = buf[pos:min(pos + SEARCH_CHUNK, end)]
+        if not chunk:
+            # The file was truncated under the snapshot
+            break
+        if pos + len(chunk) < end:
+            cut = chunk.rfind(b"\n")
+            if cut >= 0:
+                chunk = chunk[:cut + 1]
+            else:
+                # A line longer than a chunk: read through its end
+                nl = buf.find(b"\n", pos + len(chunk), end)
+                chunk = buf[pos:end if nl < 0 else nl + 1]
+
+        for offset, text in query.scan_chunk(chunk):
+            yield {"line": line_base + offset, "text": text}
+        line_base += chunk.count(b"\n")
+        pos += len(chunk)
+
+    if stats is not None:
+        stats["newlines"] = line_base - first_line
+
+
+def split_ranges(filepath, size, segment_bytes=SEGMENT_BYTES, start=0):
+    """Cut [start, size) into byte ranges that start right after a newline (start must be a line start)"""
+    buf = get_shared_file(filepath).snapshot()
+    size = min(size, len(buf))
+    ranges = []
+    while start < size:
+        nl = buf.find(b"\n", start + segment_bytes - 1, size) if start + segment_bytes < size else -1
+        end = size if nl < 0 else nl + 1
+        ranges.append((start, end))
+        start = end
+    return ranges
+
+
+def _scan_range(filepath, query, ranges, limit):
+    """Worker: matches in (start, end, first_line) ranges as (line, text), plus the last range's newline count.
+
+    Stops after ``limit`` matches, in which case the newline count is None
+    because no later range will be needed.
+    """
+    stats = {}
+    matches = []
+    for start, end, first_line in ranges:
+        for match in iter_matches(filepath, query, start, end, first_line, stats=stats):
+            matches.append((match["line"], match["text"]))
+            if len(matches) >= limit:
+                return matches, None
+    return matches, stats.get("newlines", 0)
+
+
+def _plan_jobs(filepath, ranges, job_bytes):
+    """Group (start, end, first_line) ranges into pool jobs of about job_bytes.
+
+    A job is (ranges, relative): longer ranges are split at newlines, and
+    since only the first piece's line number is known, later pieces are
+    relative jobs whose line numbers count from 0.
+    """
+    jobs = []
+    batch = []
+    batch_bytes = 0
+    for start, end, first_line in ranges:
+        if end - start > job_bytes:
+            if batch:
+                jobs.append((batch, False))
+                batch, batch_bytes = [], 0
+            pieces = split_ranges(filepath, end, job_bytes, start)
+            jobs.append(([(*pieces[0], first_line)], False))
+            jobs.extend(([(*piece, 0)], True) for piece in pieces[1:])
+            continue
+        batch.append((start, end, first_line))
+        batch_bytes += end - start
+        if batch_bytes >= job_bytes:
+            jobs.append((batch, False))
+            batch, batch_bytes = [], 0
+    if batch:
+        jobs.append((batch, False))
+    return jobs
+
+
+_process_pool = None
+_process_pool_workers = 0
+_process_pool_lock = threading.Lock()
+
+
+def get_process_pool(workers):
+    """Shared search process pool, recreated if the worker count changes or it broke.
+
+    A replaced pool is shut down without cancelling anything, so searches
+    already running on it finish their ranges.
+    """
+    global _process_pool, _process_pool_workers
+    with _process_pool_lock:
+        if _process_pool is None or _process_pool_workers != workers:
+            if _process_pool is not None:
+                _process_pool.shutdown(wait=False)
+            # spawn: the server process runs threads, which fork does not copy safely
+            _process_pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+            _process_pool_workers = workers
+        return _process_pool
+
+
+def _discard_process_pool(pool):
+    """Forget a broken pool so the next search starts a fresh one"""
+    global _process_pool
+    with _process_pool_lock:
+        if _process_pool is pool:
+            _process_pool = None
+
+
+def iter_matches_parallel(filepath, query, limit, workers=None, cancel=None, index=None):
+    """Like iter_matches, but scans large files on several cores.
+
+    The bytes to scan are cut into about two jobs per worker (at most
+    SEGMENT_BYTES each), submitted in file order with at most two per
+    worker in flight, and results are merged in line order. Once
+    ``limit`` matches have been produced, jobs that have not started are
+    cancelled. With an ``index`` (a term_index.TermIndex) that can narrow
+    the query, only its candidate blocks and the unindexed parts of the
+    file are scanned, in parallel the same way.
+    """
+    workers = SEARCH_WORKERS if workers is None else workers
+    size = os.path.getsize(filepath)
+    ranges = index.candidate_ranges(query) if index is not None else None
+    if ranges is None:
+        ranges = [(0, size, 1)]
+    else:
+        ranges = [(start, size if end is None else end, first_line) for start, end, first_line in ranges]
+    scanned = sum(end - start for start, end, _ in ranges)
+    if workers <= 1 or scanned < PARALLEL_MIN_BYTES:
+        for start, end, first_line in ranges:
+            yield from iter_matches(filepath, query, start, end, first_line, cancel=cancel)
+        return
+
+    pool = get_process_pool(workers)
+    jobs = _plan_jobs(filepath, ranges, max(1, min(SEGMENT_BYTES, scanned // (workers * 2))))
+    pending = deque()
+
+    def submit():
+        if len(pending) + done >= len(jobs):
+            return
+        i = len(pending) + done
+        try:
+            future = pool.submit(_scan_range, filepath, query, jobs[i][0], limit)
+        except (BrokenProcessPool, RuntimeError):
+            # Broken, or shut down by another search that changed the worker count
+            future = None
+        pending.append(future)
+
+    done = 0
+    for _ in range(workers * 2):
+        submit()
+
+    line_base = 1
+    produced = 0
+    try:
+        while pending:
+            if cancel is not None and cancel.is_set():
+                return
+            future = pending.popleft()
+            job_ranges, relative = jobs[done]
+            if future is not None:
+                try:
+                    matches, newlines = future.result()
+                except (BrokenProcessPool, CancelledError):
+                    future = None
+            if future is None:
+                # A worker died (e.g. OOM-killed) or the pool went away; finish this search in-process
+                _discard_process_pool(pool)
+                for job_ranges, relative in jobs[done:]:
+                    for start, end, first_line in job_ranges:
+                        stats = {}
+                        first_line = line_base if relative else first_line
+                        for match in iter_matches(filepath, query, start, end, first_line, cancel=cancel, stats=stats):
+                            yield match
+                            produced += 1
+                            if produced >= limit:
+                                return
+                        line_base = first_line + stats.get("newlines", 0)
+                return
+            done += 1
+            submit()
+            offset = line_base if relative else 0
+            for line, text in matches:
+                yield {"line": offset + line, "text": text}
+                produced += 1
+                if produced >= limit:
+                    return
+            if newlines is None:
+                return
+            line_base = (line_base if relative else job_ranges[-1][2]) + newlines
+    finally:
+        for future in pending:
+            if future is not None:
+                future.cancel()
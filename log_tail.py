@@ -0,0 +1,389 @@
+import os
+import json
+import zlib
+import struct
+import asyncio
+
+from file_watch import watch_file
+from log_index import get_line_index
+
+# Live batching: flush after this many lines or this many seconds
+BATCH_LINES = 50
+BATCH_INTERVAL = 0.3
+
+# Bytes requested from the file per read while following it
+READ_SIZE = 256 * 1024
+# A line without a newline is flushed once it grows past this size
+MAX_PENDING_BYTES = 1024 * 1024
+
+# Frames buffered per subscriber before the oldest ones are dropped
+SUBSCRIBER_QUEUE_FRAMES = 256
+
+# Live protocols a viewer can pick with ws://.../ws/<alias>?proto=...
+#   json: {"type": "log_batch", "data": [...]} text frames
+#   bin:  binary batches, see encode_batch
+#   binz: binary batches, zlib-compressed when at least COMPRESS_MIN_BYTES
+PROTOCOLS = ("json", "bin", "binz")
+COMPRESS_MIN_BYTES = 512
+FRAME_LOG_BATCH = 1
+FRAME_NUMBERED_BATCH = 2  # filtered batch: line numbers (u64 each) precede the lines
+FRAME_LIVE_BATCH = 3      # live batch: the first line's number (u64) precedes the lines
+FLAG_ZLIB = 1
+# frame type, flags, line count
+_FRAME_HEADER = struct.Struct(">BBI")
+
+
+def decode_lines(data):
+    """Decode a block of newline-separated bytes once and split it into lines"""
+    return [line.rstrip() for line in data.decode("utf-8", errors="replace").split("\n")]
+
+
+def split_lines(pending, data):
+    """Split pending + data into (lines, partial line, open).
+
+    A partial line is carried over to the next read so a writer caught
+    mid-line never shows up as two separate lines. Past MAX_PENDING_BYTES
+    it is flushed anyway; ``open`` is then True, meaning the last line
+    returned continues in the next read and is not a new line number.
+    """
+    data = pending + data
+    cut = data.rfind(b"\n")
+    if cut < 0:
+        if len(data) > MAX_PENDING_BYTES:
+            return decode_lines(data), b"", True
+        return [], data, False
+    return decode_lines(data[:cut]), data[cut + 1:], False
+
+
+def encode_batch(lines, protocol="json", line_numbers=None, first_line=None):
+    """Serialize a batch of lines for one protocol.
+
+    Binary frames are a 6-byte header (type, flags, line count) followed
+    by the lines as UTF-8 joined with "\n" (lines never contain one),
+    which skips JSON escaping entirely. Filtered batches carry the file
+    line number of every line, as a big-endian u64 array before the text;
+    live batches carry the number of their first line as one u64.
+    """
+    if protocol == "json":
+        msg = {"type": "log_batch", "data": lines}
+        if line_numbers is not None:
+            msg["line_numbers"] = line_numbers
+        elif first_line is not None:
+            msg["first_line"] = first_line
+        return json.dumps(msg)
+    body = "\n".join(lines).encode("utf-8")
+    frame_type = FRAME_LOG_BATCH
+    if line_numbers is not None:
+        body = struct.pack(f">{len(line_numbers)}Q", *line_numbers) + body
+        frame_type = FRAME_NUMBERED_BATCH
+    elif first_line is not None:
+        body = struct.pack(">Q", first_line) + body
+        frame_type = FRAME_LIVE_BATCH
+    flags = 0
+    if protocol == "binz" and len(body) >= COMPRESS_MIN_BYTES:
+        body = zlib.compress(body, 1)
+        flags |= FLAG_ZLIB
+    return _FRAME_HEADER.pack(frame_type, flags, len(lines)) + body
+
+
+def line_number_at(filepath, offset):
+    """Line number of the first line read from offset on (1 if the file can't be indexed)"""
+    try:
+        return get_line_index(filepath).line_of(offset)
+    except OSError:
+        return 1
+
+
+class Subscriber:
+    """Bounded frame queue for one WebSocket viewer.
+
+    When a viewer falls behind, the oldest frames are dropped and the
+    number of lines they carried is added to ``skipped`` so the sender
+    can tell the client what it missed.
+
+    Flow control is driven by the client: while ``paused`` nothing is
+    sent (frames keep queuing and the oldest are dropped), and once a
+    client grants credits, each sent line batch uses one and sending stops
+    when they run out until the client acknowledges more.
+
+    A viewer may also set a filter (a log_search.SearchQuery); it then
+    only receives matching lines, tagged with their line numbers.
+    """
+
+    def __init__(self, maxsize=SUBSCRIBER_QUEUE_FRAMES, protocol="json"):
+        self.queue = asyncio.Queue(maxsize=maxsize)
+        self.protocol = protocol
+        self.skipped = 0
+        self.paused = False
+        self.credits = None  # None until the client opts into credit-based flow control
+        self.writable = asyncio.Event()
+        self.writable.set()
+        self.query = None
+        self.filter_key = None  # viewers with equal keys share one encoded frame
+
+    def push(self, frame, line_count):
+        if self.queue.full():
+            _, dropped = self.queue.get_nowait()
+            self.skipped += dropped
+        self.queue.put_nowait((frame, line_count))
+
+    async def get(self):
+        """Return the next (frame, line_count) pair"""
+        return await self.queue.get()
+
+    async def wait_writable(self):
+        """Wait until the client is neither paused nor out of credits"""
+        await self.writable.wait()
+
+    def set_filter(self, query, key):
+        """Only send lines matching query from now on (None clears the filter)"""
+        self.query = query
+        self.filter_key = key if query is not None else None
+
+    def pause(self):
+        self.paused = True
+        self._update()
+
+    def resume(self):
+        self.paused = False
+        self._update()
+
+    def grant(self, frames):
+        """Add credits for ``frames`` more frames (enables flow control on first use)"""
+        self.credits = (self.credits or 0) + max(0, frames)
+        self._update()
+
+    def sent(self):
+        """Account for one frame sent to the client"""
+        if self.credits is not None:
+            self.credits -= 1
+            self._update()
+
+    def _update(self):
+        if self.paused or (self.credits is not None and self.credits <= 0):
+            self.writable.clear()
+        else:
+            self.writable.set()
+
+
+class TailHub:
+    """Single reader for one file that fans pre-serialized batches out to all subscribers"""
+
+    def __init__(self, filepath, batch_lines=BATCH_LINES, batch_interval=BATCH_INTERVAL, executor=None):
+        self.filepath = filepath
+        self.batch_lines = batch_lines
+        self.batch_interval = batch_interval
+        # Runs the line-number lookup and viewer filters (None: the loop's default executor)
+        self.executor = executor
+        self.subscribers = set()
+        self.task = None
+        # File line number of the next line read
+        self.next_line = 1
+
+    def subscribe(self, protocol="json"):
+        sub = Subscriber(protocol=protocol)
+        self.subscribers.add(sub)
+        if self.task is None:
+            self.task = asyncio.create_task(self._run())
+        return sub
+
+    def unsubscribe(self, sub):
+        self.subscribers.discard(sub)
+        if not self.subscribers:
+            if self.task is not None:
+                self.task.cancel()
+                self.task = None
+            _hubs.pop(self.filepath, None)
+
+    async def broadcast(self, lines, open_lines=()):
+        """Encode a batch once per protocol and filter in use and queue it for every subscriber.
+
+        ``open_lines`` holds the indexes of pieces of an oversized line that
+        continue in the next piece; they share one line number with it.
+        Viewer filters run on the executor so a slow regex can't block the
+        event loop; a filter that fails is cleared for its viewers only.
+        """
+        first = self.next_line
+        if open_lines:
+            numbers = []
+            for i in range(len(lines)):
+                numbers.append(first)
+                if i not in open_lines:
+                    first += 1
+            self.next_line = first
+        else:
+            numbers = range(first, first + len(lines))
+            self.next_line += len(lines)
+        targets = [(sub, (sub.protocol, sub.filter_key)) for sub in list(self.subscribers)]
+        encodings = {}
+        for sub, key in targets:
+            encodings.setdefault(key, (sub.protocol, sub.query))
+        if any(query is not None for _, query in encodings.values()):
+            loop = asyncio.get_running_loop()
+            frames = await loop.run_in_executor(self.executor, self._encode_all, lines, numbers, encodings)
+        else:
+            frames = self._encode_all(lines, numbers, encodings)
+        for sub, key in targets:
+            frame = frames[key]
+            if isinstance(frame, Exception):
+                self._filter_failed(sub, frame, lines, numbers[0])
+            elif frame is not None:
+                sub.push(*frame)
+
+    @classmethod
+    def _encode_all(cls, lines, numbers, encodings):
+        """{key: frame} for {key: (protocol, query)}; a failing filter's frame is its exception"""
+        frames = {}
+        for key, (protocol, query) in encodings.items():
+            try:
+                frames[key] = cls._encode(lines, numbers, protocol, query)
+            except Exception as e:
+                frames[key] = e
+        return frames
+
+    @staticmethod
+    def _encode(lines, numbers, protocol, query):
+        """(frame, line_count) for one protocol and filter, or None if nothing matched"""
+        if query is None:
+            return encode_batch(lines, protocol, first_line=numbers[0]), len(lines)
+        matches = query.filter_lines(lines)
+        if not matches:
+            return None
+        return encode_batch(
+            [line for _, line in matches], protocol, [numbers[i] for i, _ in matches]
+        ), len(matches)
+
+    @staticmethod
+    def _filter_failed(sub, error, lines, first_line):
+        """Drop a viewer's failing filter, tell that viewer, and send it the batch unfiltered"""
+        sub.set_filter(None, None)
+        sub.push(json.dumps({"type": "filter", "active": False, "error": f"Live filter failed and was cleared: {error}"}), 0)
+        sub.push(encode_batch(lines, sub.protocol, first_line=first_line), len(lines))
+
+    def broadcast_sys(self, msg):
+        self._push(json.dumps({"type": "sys", "msg": msg}), 0)
+
+    def _push(self, frame, line_count):
+        for sub in list(self.subscribers):
+            sub.push(frame, line_count)
+
+    async def _run(self):
+        try:
+            await self._tail()
+        except Exception as e:
+            self.broadcast_sys(f"Error: tailing stopped ({e})")
+        finally:
+            # Let the next subscribe start a new tailer
+            if self.task is asyncio.current_task():
+                self.task = None
+
+    async def _tail(self):
+        loop = asyncio.get_running_loop()
+        f = open(self.filepath, "rb", buffering=0)
+        # Seek to end for live tailing
+        f.seek(0, 2)
+        self.next_line = await loop.run_in_executor(self.executor, line_number_at, self.filepath, f.tell())
+        watch = watch_file(self.filepath)
+
+        buf = bytearray(READ_SIZE)
+        view = memoryview(buf)
+        pending = b""
+
+        try:
+            live_buffer = []
+            open_lines = set()
+            last_send = loop.time()
+
+            while True:
+                n = f.readinto(buf)
+                if n:
+                    watch.reset()
+                    lines, pending, open_end = split_lines(pending, view[:n])
+                    live_buffer.extend(lines)
+                    if open_end:
+                        open_lines.add(len(live_buffer) - 1)
+
+                    # Send batch if buffer is large or time elapsed
+                    current_time = loop.time()
+                    if len(live_buffer) >= self.batch_lines or (current_time - last_send) >= self.batch_interval:
+                        await self.broadcast(live_buffer, open_lines)
+                        live_buffer = []
+                        open_lines = set()
+                        last_send = current_time
+                        await asyncio.sleep(0)  # Yield control
+                    continue
+
+                # No new bytes - send any pending buffer
+                if live_buffer:
+                    await self.broadcast(live_buffer, open_lines)
+                    live_buffer = []
+                    open_lines = set()
+                    last_send = loop.time()
+
+                reason = self._detect_rotation(f)
+                if reason == "truncated":
+                    f.seek(0)
+                    pending = b""
+                    self.next_line = 1
+                    self.broadcast_rotated(reason)
+                    continue
+                if reason == "renamed":
+                    try:
+                        new_f = open(self.filepath, "rb", buffering=0)
+                    except OSError:
+                        # Path vanished again between stat and open; retry on next wake
+                        await watch.wait()
+                        continue
+                    # Drain whatever the writer appended to the old file before switching
+                    remaining = pending + f.read()
+                    pending = b""
+                    if remaining:
+                        await self.broadcast(decode_lines(remaining.rstrip(b"\n")))
+                    f.close()
+                    f = new_f
+                    watch.close()
+                    watch = watch_file(self.filepath)
+                    self.next_line = 1
+                    self.broadcast_rotated(reason)
+                    continue
+
+                # Wait for a change
+                await watch.wait()
+        finally:
+            f.close()
+            watch.close()
+
+    def _detect_rotation(self, f):
+        """Return 'renamed', 'truncated' or None for the file behind handle f"""
+        try:
+            path_st = os.stat(self.filepath)
+        except FileNotFoundError:
+            # Rotated away but not recreated yet; keep reading the old handle
+            return None
+        handle_st = os.fstat(f.fileno())
+        if (path_st.st_dev, path_st.st_ino) != (handle_st.st_dev, handle_st.st_ino):
+            return "renamed"
+        if handle_st.st_size < f.tell():
+            return "truncated"
+        return None
+
+    def broadcast_rotated(self, reason):
+        """Tell viewers the file was rotated so line numbers restart"""
+        self._push(json.dumps({"type": "sys", "msg": "__ROTATED__", "reason": reason}), 0)
+
+
+_hubs = {}
+
+
+def get_tail_hub(filepath, batch_lines=BATCH_LINES, batch_interval=BATCH_INTERVAL, executor=None):
+    """Return the shared tail hub for filepath, creating it on first use.
+
+    Batch settings and the executor only apply when the hub is created;
+    viewers joining a running hub share its settings.
+    """
+    key = os.path.abspath(filepath)
+    hub = _hubs.get(key)
+    if hub is None:
+        hub = TailHub(key, batch_lines=batch_lines, batch_interval=batch_interval, executor=executor)
+        _hubs[key] = hub
+    return hub
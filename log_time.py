@@ -0,0 +1,116 @@
+import re
+from datetime import datetime, date
+
+# A line's timestamp must start within its first TS_SCAN_BYTES bytes
+TS_SCAN_BYTES = 64
+# Lines (within PROBE_BYTES) looked at from the end of a file for its last timestamp
+PROBE_LINES = 64
+PROBE_BYTES = 64 * 1024
+SCAN_BYTES = 256 * 1024   # bytes read per step while scanning for a time
+
+# "2024-01-01 12:00:00", optionally with ",123" / ".123456" and a "T" separator
+_TS = re.compile(rb"(\d{4})-(\d\d)-(\d\d)[ T](\d\d):(\d\d):(\d\d)(?:[.,](\d{1,9}))?")
+_AT_TIME = re.compile(r"(\d\d?):(\d\d)(?::(\d\d)(?:[.,](\d{1,9}))?)?")
+
+
+def ts_key(year, month, day, hour, minute, second, fraction=""):
+    """Seconds since 0001-01-01 for a wall-clock time; no time zone, just a sortable number"""
+    key = date(year, month, day).toordinal() * 86400 + hour * 3600 + minute * 60 + second
+    return key + (float(f"0.{fraction}") if fraction else 0.0)
+
+
+def line_time(buf, start, end=None):
+    """Timestamp key of the line starting at start, or None"""
+    limit = start + TS_SCAN_BYTES if end is None else min(end, start + TS_SCAN_BYTES)
+    nl = buf.find(b"\n", start, limit)
+    if nl >= 0:
+        # Never borrow the next line's timestamp
+        limit = nl
+    m = _TS.search(buf, start, limit)
+    if m is None:
+        return None
+    try:
+        year, month, day, hour, minute, second = (int(g) for g in m.groups()[:6])
+        return ts_key(year, month, day, hour, minute, second, (m.group(7) or b"").decode())
+    except ValueError:
+        return None
+
+
+def format_key(key):
+    """ISO text for a timestamp key"""
+    days, seconds = divmod(key, 86400)
+    day = date.fromordinal(int(days))
+    whole = int(seconds)
+    text = f"{day.isoformat()} {whole // 3600:02d}:{whole % 3600 // 60:02d}:{whole % 60:02d}"
+    millis = round((seconds - whole) * 1000)
+    return f"{text}.{min(millis, 999):03d}" if millis else text
+
+
+def parse_at(at, reference=None):
+    """Parse "YYYY-MM-DD HH:MM[:SS[.fff]]" (or ISO with T) into a timestamp key.
+
+    A bare "HH:MM[:SS]" uses the date of ``reference`` (a timestamp key,
+    e.g. the file's last line), or today. Raises ValueError.
+    """
+    at = at.strip()
+    m = _TS.fullmatch(at.encode("ascii", "replace"))
+    if m is None:
+        # Allow minutes precision: "2024-01-01 12:00"
+        try:
+            return ts_key(*datetime.strptime(at.replace("T", " "), "%Y-%m-%d %H:%M").timetuple()[:6])
+        except ValueError:
+            pass
+        m_time = _AT_TIME.fullmatch(at)
+        if m_time is None:
+            raise ValueError(f"Invalid time '{at}'; use HH:MM:SS or YYYY-MM-DD HH:MM:SS")
+        day = date.fromordinal(int(reference // 86400)) if reference is not None else date.today()
+        hour, minute, second, fraction = m_time.groups()
+        if int(hour) > 23 or int(minute) > 59 or int(second or 0) > 59:
+            raise ValueError(f"Invalid time '{at}'")
+        return ts_key(day.year, day.month, day.day, int(hour), int(minute), int(second or 0), fraction or "")
+    year, month, day, hour, minute, second = (int(g) for g in m.groups()[:6])
+    return ts_key(year, month, day, hour, minute, second, (m.group(7) or b"").decode())
+
+
+def scan_for_time(buf, pos, end, key):
+    """Offset of the first line from pos on stamped at or after key (end if none)"""
+    while pos < end:
+        data = buf[pos:min(end, pos + SCAN_BYTES)]
+        if not data:
+            break
+        last = pos + len(data) >= end
+        i = 0
+        while i < len(data):
+            nl = data.find(b"\n", i)
+            if nl < 0 and not last and i:
+                # Partial line: read it again with the next chunk
+                break
+            found = line_time(data, i, len(data) if nl < 0 else nl)
+            if found is not None and found >= key:
+                return pos + i
+            if nl < 0:
+                if last:
+                    return end
+                # A line longer than a chunk: skip to its end
+                nl = buf.find(b"\n", pos + len(data), end)
+                if nl < 0:
+                    return end
+                i = nl + 1 - pos
+                break
+            i = nl + 1
+        pos += i
+    return end
+
+
+def last_time(buf, size):
+    """Timestamp key of the last stamped line within PROBE_LINES of the end, or None"""
+    start = max(0, size - PROBE_BYTES)
+    lines = buf[start:size].split(b"\n")
+    if start:
+        # The first piece is the tail of a longer line
+        lines.pop(0)
+    for line in reversed(lines[-PROBE_LINES - 1:]):
+        key = line_time(line, 0)
+        if key is not None:
+            return key
+    return None
@@ -0,0 +1,90 @@
+import sys
+import threading
+from collections import OrderedDict
+
+# Memory budget for cached history windows (decoded str lines)
+PAGE_CACHE_BYTES = 64 * 1024 * 1024
+
+
+def _lines_size(lines):
+    return sys.getsizeof(lines) + sum(sys.getsizeof(line) for line in lines)
+
+
+class PageCache:
+    """LRU cache of decoded line windows, bounded by an estimated byte size.
+
+    Entries are keyed by file identity (path, device, inode and the line
+    index generation, which changes on truncation or rewrite) plus
+    (start_line, count). A window that ends before the last complete line
+    can never change and is served until evicted. A window that touches
+    the live end of the file is only served while the file size is
+    unchanged, so appends refresh just those windows.
+    """
+
+    def __init__(self, max_bytes=PAGE_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()  # key -> (lines, size_or_None, nbytes)
+        self.identities = {}  # path -> (dev, ino, generation)
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def read_lines(self, index, start_line, count):
+        """index.read_lines(start_line, count), served from the cache when still valid"""
+        identity = (index.dev, index.ino, index.generation)
+        key = (index.filepath, identity, start_line, count)
+        file_size = index.file_size
+        newlines = index.newlines
+
+        with self.lock:
+            if self.identities.get(index.filepath, identity) != identity:
+                # Rotated, truncated or rewritten: nothing cached for the old file is valid
+                self._drop_file(index.filepath)
+            self.identities[index.filepath] = identity
+
+            entry = self.entries.get(key)
+            if entry is not None and (entry[1] is None or entry[1] == file_size):
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+
+        lines = index.read_lines(start_line, count)
+        # Complete lines never change; anything reaching past them depends on the size
+        stable = start_line + count - 1 <= newlines
+        self._store(key, lines, None if stable else file_size)
+        return lines
+
+    def _store(self, key, lines, size):
+        nbytes = _lines_size(lines)
+        if nbytes > self.max_bytes:
+            return
+        with self.lock:
+            old = self.entries.pop(key, None)
+            if old is not None:
+                self.bytes -= old[2]
+            self.entries[key] = (lines, size, nbytes)
+            self.bytes += nbytes
+            while self.bytes > self.max_bytes:
+                _, (_, _, evicted) = self.entries.popitem(last=False)
+                self.bytes -= evicted
+
+    def _drop_file(self, filepath):
+        for key in [k for k in self.entries if k[0] == filepath]:
+            self.bytes -= self.entries.pop(key)[2]
+
+    def stats(self):
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+                "entries": len(self.entries),
+                "bytes": self.bytes,
+                "max_bytes": self.max_bytes,
+            }
+
+
+page_cache = PageCache()
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""Benchmark full-file search with 1..N worker processes.
+
+Generates a log file (or uses --file), then times a search that must scan
+the whole file (a term that never matches) for each worker count and
+prints the speedup over a single process.
+"""
+
+import os
+import time
+import random
+import string
+import argparse
+from datetime import datetime
+
+import log_search
+from log_search import SearchQuery, iter_matches_parallel
+
+LEVELS = ["INFO", "DEBUG", "WARNING", "ERROR", "CRITICAL"]
+SERVICES = ["auth", "api", "worker", "db", "cache"]
+
+
+def generate_file(path, size_mb):
+    print(f"Generating {size_mb} MB of log lines in {path}...")
+    target = size_mb * 1024 * 1024
+    ts = datetime.now().strftime("%Y-%m-%d %H:%M:%S,%f")[:-3]
+    lines = [
+        f"{ts} [{random.choice(LEVELS)}] [{random.choice(SERVICES)}] "
+        + "".join(random.choices(string.ascii_letters + string.digits + " ", k=180)) + "\n"
+        for _ in range(10000)
+    ]
+    block = "".join(lines).encode()
+    with open(path, "wb") as f:
+        written = 0
+        while written < target:
+            f.write(block)
+            written += len(block)
+
+
+def run_search(path, query, workers, limit):
+    start = time.perf_counter()
+    count = sum(1 for _ in iter_matches_parallel(path, query, limit, workers=workers))
+    return time.perf_counter() - start, count
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark EZLog parallel search")
+    parser.add_argument("--file", help="Existing log file to search (default: generate one)")
+    parser.add_argument("--size-mb", type=int, default=2048, help="Size of the generated file in MB")
+    parser.add_argument("--workers", default="1,2,4,8", help="Comma-separated worker counts to try")
+    parser.add_argument("--term", default="NO_SUCH_TOKEN_IN_THIS_LOG", help="Search term")
+    parser.add_argument("--limit", type=int, default=1000, help="Maximum matches to collect")
+    parser.add_argument("--runs", type=int, default=3, help="Runs per worker count (best is reported)")
+    args = parser.parse_args()
+
+    path = args.file or "search_benchmark.log"
+    if not args.file and not os.path.exists(path):
+        generate_file(path, args.size_mb)
+
+    size_mb = os.path.getsize(path) / (1024 * 1024)
+    query = SearchQuery([args.term])
+    # Make sure the parallel path is used even for small test files
+    log_search.PARALLEL_MIN_BYTES = 0
+
+    print(f"File: {path} ({size_mb:.0f} MB), CPUs: {os.cpu_count()}")
+    baseline = None
+    for workers in [int(w) for w in args.workers.split(",")]:
+        # Warm up the pool so process start-up is not measured
+        run_search(path, query, workers, args.limit)
+        best, count = min(run_search(path, query, workers, args.limit) for _ in range(args.runs))
+        baseline = baseline or best
+        print(
+            f"workers={workers:<3} {best:7.2f}s  {size_mb / best:8.0f} MB/s  "
+            f"speedup={baseline / best:4.1f}x  matches={count}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+import os
+import time
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+from tracked_logs import parse_alias
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS logs (
+    alias TEXT PRIMARY KEY,
+    project TEXT,
+    path TEXT NOT NULL,
+    size INTEGER,
+    inode INTEGER,
+    line_count INTEGER,
+    checked_at REAL
+);
+CREATE INDEX IF NOT EXISTS logs_project ON logs (project);
+CREATE INDEX IF NOT EXISTS logs_path ON logs (path);
+"""
+
+
+class SQLiteStore:
+    """Tracked logs in SQLite (WAL mode), indexed by project and path.
+
+    Mirrors the dict-based operations of tracked_logs so large stores can
+    add, remove and look up aliases without rewriting everything. One
+    connection is shared by all threads of a process behind a lock.
+    """
+
+    def __init__(self, path):
+        self.path = str(path)
+        self.lock = threading.RLock()
+        self.conn = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+        # Lets callers notice the database file being replaced underneath us
+        self.ino = os.stat(self.path).st_ino
+        # Commits on our own connection don't bump data_version, so count them
+        self.writes = 0
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+    @contextmanager
+    def transaction(self, changes_aliases=True):
+        with self.lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield self.conn
+            except BaseException:
+                self.conn.execute("ROLLBACK")
+                raise
+            self.conn.execute("COMMIT")
+            if changes_aliases:
+                self.writes += 1
+
+    def version(self):
+        """Changes whenever any connection, in any process, commits"""
+        with self.lock:
+            return self.conn.execute("PRAGMA data_version").fetchone()[0], self.writes
+
+    def load_all(self) -> dict:
+        with self.lock:
+            return dict(self.conn.execute("SELECT alias, path FROM logs ORDER BY rowid"))
+
+    def get_path(self, alias: str):
+        with self.lock:
+            row = self.conn.execute("SELECT path FROM logs WHERE alias = ?", (alias,)).fetchone()
+        return row[0] if row else None
+
+    def add(self, alias: str, path: str):
+        try:
+            with self.transaction() as conn:
+                conn.execute(
+                    "INSERT INTO logs (alias, project, path) VALUES (?, ?, ?)",
+                    (alias, parse_alias(alias)[0], path)
+                )
+        except sqlite3.IntegrityError:
+            raise ValueError(f"Alias '{alias}' already exists")
+
+    def add_many(self, pairs) -> list:
+        """Insert (alias, path) pairs, skipping existing aliases; returns the ones added"""
+        added = []
+        with self.transaction() as conn:
+            for alias, path in pairs:
+                cur = conn.execute(
+                    "INSERT OR IGNORE INTO logs (alias, project, path) VALUES (?, ?, ?)",
+                    (alias, parse_alias(alias)[0], path)
+                )
+                if cur.rowcount:
+                    added.append((alias, path))
+        return added
+
+    def update(self, alias: str, path: str):
+        with self.transaction() as conn:
+            cur = conn.execute(
+                "UPDATE logs SET path = ?, size = NULL, inode = NULL, line_count = NULL WHERE alias = ?",
+                (path, alias)
+            )
+            if not cur.rowcount:
+                raise ValueError(f"Alias '{alias}' does not exist")
+
+    def remove_many(self, aliases):
+        """Remove aliases; raises ValueError (and removes nothing) if any is missing"""
+        with self.transaction() as conn:
+            missing = [
+                a for a in aliases
+                if conn.execute("SELECT 1 FROM logs WHERE alias = ?", (a,)).fetchone() is None
+            ]
+            if missing:
+                raise ValueError(f"Aliases not found: {', '.join(missing)}")
+            conn.executemany("DELETE FROM logs WHERE alias = ?", [(a,) for a in aliases])
+
+    def remove_project(self, project: str) -> int:
+        with self.transaction() as conn:
+            removed = conn.execute("DELETE FROM logs WHERE project = ?", (project,)).rowcount
+            if not removed:
+                raise ValueError(f"Project '{project}' not found")
+        return removed
+
+    def replace_all(self, data: dict):
+        with self.transaction() as conn:
+            conn.execute("DELETE FROM logs")
+            conn.executemany(
+                "INSERT INTO logs (alias, project, path) VALUES (?, ?, ?)",
+                [(alias, parse_alias(alias)[0], path) for alias, path in data.items()]
+            )
+
+    def apply_changes(self, before: dict, after: dict):
+        """Write only the difference between two snapshots of the mapping"""
+        removed = [(alias,) for alias in before if alias not in after]
+        changed = [
+            (alias, parse_alias(alias)[0], path)
+            for alias, path in after.items() if before.get(alias) != path
+        ]
+        if not removed and not changed:
+            return
+        with self.transaction() as conn:
+            conn.executemany("DELETE FROM logs WHERE alias = ?", removed)
+            conn.executemany("INSERT OR REPLACE INTO logs (alias, project, path) VALUES (?, ?, ?)", changed)
+
+    def set_metadata(self, alias: str, size: int, inode: int, line_count: int):
+        # Metadata alone doesn't invalidate cached alias mappings in this process
+        with self.transaction(changes_aliases=False) as conn:
+            conn.execute(
+                "UPDATE logs SET size = ?, inode = ?, line_count = ?, checked_at = ? WHERE alias = ?",
+                (size, inode, line_count, time.time(), alias)
+            )
+
+    def get_metadata(self, alias: str) -> dict:
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT size, inode, line_count, checked_at FROM logs WHERE alias = ?", (alias,)
+            ).fetchone()
+        if row is None:
+            return {}
+        return dict(zip(("size", "inode", "line_count", "checked_at"), row))
@@ -1,3 +1,6 @@
+// Row classes per level code from the filter worker
+const LEVEL_CLASSES = ['', 'text-red-400', 'text-yellow-400', 'text-blue-400', 'text-green-400'];
+
 class LogViewer {
     constructor(aliases, groups) {
         this.aliases = aliases;
@@ -25,11 +28,17 @@ class LogViewer {
         this.isSearchMode = false;
         this.lastSearchQuery = "";
         this.searchResults = [];
+        this.searchAbort = null;
+        this.textDecoder = new TextDecoder();
+
+        // Flow control: the server sends at most this many live frames ahead of our acknowledgements
+        this.creditWindow = 16;
+        this.liveStarted = false;
         
-        // Performance: In-memory line buffer (circular buffer with max limit)
-        this.lines = []; // Store all lines in memory
-        this.maxLines = 10000; // Limit to prevent memory bloat
-        this.renderChunkSize = 100; // Render in chunks
+        // Performance: session history in a ring buffer; only visible rows are rendered
+        this.maxLines = 1000000;
+        this.buffer = new LineBuffer(this.maxLines);
+        this.nextLineNo = 1; // file line number of the next live line
         
         // Debounce/Throttle timers
         this.filterDebounce = null;
@@ -48,6 +57,7 @@ class LogViewer {
             downloadBtn: document.getElementById('downloadBtn'),
             pendingBadge: document.getElementById('pendingCount'),
             filterInput: document.getElementById('logFilter'),
+            timeInput: document.getElementById('jumpTime'),
             welcome: document.getElementById('welcomeMsg'),
             themeBtn: document.getElementById('themeBtn'),
             loading: document.getElementById('loadingIndicator'),
@@ -57,6 +67,17 @@ class LogViewer {
             historyLoader: document.getElementById('historyLoader')
         };
 
+        this.viewport = new VirtualLog(this.dom.logContainer, this.buffer, {
+            rowClass: (seq) => this.rowClass(seq),
+            onRowClick: (seq) => this.openSearchContext(this.buffer.lineNo(seq), this.lastSearchQuery)
+        });
+
+        // Filtering and level classification run in a worker that mirrors the buffer
+        this.filterId = 0;
+        this.filterWorker = new Worker('/static/filter_worker.js');
+        this.filterWorker.onmessage = (e) => this.handleWorkerMessage(e.data);
+        this.filterWorker.postMessage({ type: 'init', capacity: this.maxLines });
+
         this.init();
     }
 
@@ -98,10 +119,7 @@ class LogViewer {
             this.dom.goBottomBtn.addEventListener('click', () => this.goToBottom());
         }
         
-        document.getElementById('clearBtn').addEventListener('click', () => {
-            this.dom.logContainer.innerHTML = '';
-            this.lines = []; // Clear memory buffer too
-        });
+        document.getElementById('clearBtn').addEventListener('click', () => this.clearLines());
 
         // Debounced filter (300ms delay)
         this.dom.filterInput.addEventListener('input', (e) => {
@@ -119,6 +137,15 @@ class LogViewer {
             }
         });
 
+        if (this.dom.timeInput) {
+            this.dom.timeInput.addEventListener('keydown', (e) => {
+                if (e.key === 'Enter') {
+                    e.preventDefault();
+                    this.jumpToTime(e.target.value);
+                }
+            });
+        }
+
         window.addEventListener('popstate', () => {
             const aliasFromPath = this.getAliasFromPath();
             if (aliasFromPath && this.aliases[aliasFromPath]) {
@@ -153,8 +180,9 @@ class LogViewer {
                         this.loadNewerHistory();
                     }
                     
-                    // Update button visibility
+                    // Update button visibility and the visible line range
                     this.updateNavigationButtons();
+                    this.updateFileInfo();
                     
                     this.scrollThrottle = null;
                 });
@@ -301,6 +329,7 @@ class LogViewer {
         const { updateRoute = true } = options;
 
         if (this.currentAlias === alias && this.ws?.readyState === 1) return;
+        if (this.searchAbort) this.searchAbort.abort();
         
         // Reset View
         this.currentAlias = alias;
@@ -316,10 +345,9 @@ class LogViewer {
             this.dom.title.textContent = alias;
         }
         this.dom.welcome.style.display = 'none';
-        this.dom.logContainer.innerHTML = '';
+        this.clearLines();
         this.isUserScrolling = false;
         this.pauseBuffer = [];
-        this.lines = []; // Clear in-memory buffer
         this.currentStartLine = 0;
         this.currentEndLine = 0;
         this.isAtTop = false;
@@ -337,10 +365,14 @@ class LogViewer {
         }
 
         if (this.ws) this.ws.close();
+        this.liveStarted = false;
 
-        // Connect
+        // Connect; log batches arrive as binary frames (zlib-compressed when the browser can inflate them)
         const proto = window.location.protocol === 'https:' ? 'wss' : 'ws';
-        this.ws = new WebSocket(`${proto}://${window.location.host}/ws/${encodeURIComponent(alias)}`);
+        const frameProtocol = 'DecompressionStream' in window ? 'binz' : 'bin';
+        const ws = new WebSocket(`${proto}://${window.location.host}/ws/${encodeURIComponent(alias)}?proto=${frameProtocol}`);
+        ws.binaryType = 'arraybuffer';
+        this.ws = ws;
         
         this.updateStatus('Connecting...', 'bg-yellow-600');
         this.showLoading(true);
@@ -348,126 +380,240 @@ class LogViewer {
         this.ws.onopen = () => {
             this.updateStatus('Live', 'bg-green-600');
             this.showLoading(false);
+            this.sendControl({ type: 'credit', frames: this.creditWindow });
+            if (this.isPaused) this.sendControl({ type: 'pause' });
+            if (this.filterTerm) this.sendControl(this.liveFilterMessage());
         };
         this.ws.onclose = () => {
             this.updateStatus('Offline', 'bg-red-600');
             this.showLoading(false);
         };
         
+        // Compressed frames decode asynchronously; chain them so messages keep their order
+        let received = Promise.resolve();
         this.ws.onmessage = (e) => {
-            const msg = JSON.parse(e.data);
-            
-            if (msg.type === 'metadata') {
-                this.fileSize = msg.size;
-                this.totalLines = msg.lines;
-                this.fileSizeHuman = msg.size_human;
-                // Set initial line range to last 500 lines
-                this.currentStartLine = Math.max(1, this.totalLines - 499);
-                this.currentEndLine = this.totalLines;
-                this.updateFileInfo();
-                this.updateNavigationButtons();
-            }
-            else if (msg.type === 'sys') {
-                if (msg.msg === '__LIVE_START__') this.appendDivider();
-                else this.appendLog(msg.msg, 'text-gray-500 italic');
-            } 
-            else if (msg.type === 'log_batch') {
-                this.handleIncomingBatch(msg.data);
-            }
-            else if (msg.type === 'log') {
-                this.handleIncomingLog(msg.data);
-            }
+            received = received
+                .then(() => this.parseFrame(e.data))
+                .then((msg) => {
+                    if (ws === this.ws) this.handleSocketMessage(msg);
+                })
+                .catch((err) => console.error('Bad frame', err));
         };
     }
 
+    sendControl(msg) {
+        // Flow-control messages: pause, resume, credit
+        if (this.ws && this.ws.readyState === WebSocket.OPEN) {
+            this.ws.send(JSON.stringify(msg));
+        }
+    }
+
+    async parseFrame(data) {
+        if (typeof data === 'string') return JSON.parse(data);
+
+        // Binary log batch: u8 type | u8 flags (1 = zlib) | u32 line count | lines joined by "\n"
+        // Type 2 (filtered) prefixes the lines with one big-endian u64 line number per line,
+        // type 3 (live) with the big-endian u64 number of the first line
+        const view = new DataView(data);
+        const count = view.getUint32(2);
+        let body = new Uint8Array(data, 6);
+        if (view.getUint8(1) & 1) {
+            const stream = new Blob([body]).stream().pipeThrough(new DecompressionStream('deflate'));
+            body = new Uint8Array(await new Response(stream).arrayBuffer());
+        }
+        let lineNumbers;
+        if (view.getUint8(0) === 2) {
+            const numbers = new DataView(body.buffer, body.byteOffset, count * 8);
+            lineNumbers = [];
+            for (let i = 0; i < count; i++) lineNumbers.push(Number(numbers.getBigUint64(i * 8)));
+            body = body.subarray(count * 8);
+        }
+        let firstLine;
+        if (view.getUint8(0) === 3) {
+            firstLine = Number(new DataView(body.buffer, body.byteOffset, 8).getBigUint64(0));
+            body = body.subarray(8);
+        }
+        const text = this.textDecoder.decode(body);
+        return { type: 'log_batch', data: count ? text.split('\n') : [], line_numbers: lineNumbers, first_line: firstLine };
+    }
+
+    handleSocketMessage(msg) {
+        if (msg.type === 'metadata') {
+            this.fileSize = msg.size;
+            this.totalLines = msg.lines;
+            this.fileSizeHuman = msg.size_human;
+            // Set initial line range to the tail window sent by the server
+            this.currentStartLine = msg.start_line || Math.max(1, this.totalLines - 499);
+            this.currentEndLine = this.totalLines;
+            this.nextLineNo = this.currentStartLine;
+            this.updateFileInfo();
+            this.updateNavigationButtons();
+        }
+        else if (msg.type === 'sys') {
+            if (msg.msg === '__LIVE_START__') {
+                this.liveStarted = true;
+                this.appendDivider();
+            }
+            else if (msg.msg === '__ROTATED__') this.handleRotation(msg.reason);
+            else this.appendLog(msg.msg, ROW_SYS);
+        } 
+        else if (msg.type === 'log_batch') {
+            this.handleIncomingBatch(msg.data, msg.line_numbers, msg.first_line);
+            // Return the credit once the batch is handled, so a busy tab slows the server down
+            if (this.liveStarted) this.sendControl({ type: 'credit', frames: 1 });
+        }
+        else if (msg.type === 'skipped') {
+            this.handleSkipped(msg.lines);
+        }
+        else if (msg.type === 'filter') {
+            if (msg.error) this.updateStatus(msg.error, 'bg-red-600');
+        }
+        else if (msg.type === 'log') {
+            this.handleIncomingLog(msg.data);
+        }
+    }
+
     handleIncomingLog(text) {
+        this.handleIncomingBatch([text]);
+    }
+
+    numberLines(lines, lineNumbers, firstLine) {
+        // Give each live line its file line number; filtered batches bring their own,
+        // live batches the number of their first line
+        if (!lineNumbers) {
+            if (firstLine !== undefined && firstLine !== null) this.nextLineNo = firstLine;
+            lineNumbers = lines.map((_, i) => this.nextLineNo + i);
+        }
+        const last = lineNumbers[lineNumbers.length - 1];
+        this.nextLineNo = last + 1;
+        if (this.liveStarted && last > this.totalLines) {
+            this.totalLines = last;
+            this.updateFileInfo();
+        }
+        return lineNumbers;
+    }
+
+    handleSkipped(count) {
+        // The server dropped lines for us (we fell behind or were paused for long)
+        this.nextLineNo += count;
+        const label = `Skipped ${count} lines`;
         if (this.isPaused) {
-            this.pauseBuffer.push(text);
+            this.pauseBuffer.push([label, 0, ROW_DIVIDER]);
             this.updatePendingCount();
         } else {
-            this.appendLog(text);
+            this.appendDivider(label);
         }
     }
 
-    handleIncomingBatch(lines) {
+    handleIncomingBatch(lines, lineNumbers = null, firstLine = null) {
         if (!Array.isArray(lines) || lines.length === 0) {
             return;
         }
 
+        // Filtered live batches only carry matching lines; show where each one sits in the file
+        const filtered = !!lineNumbers;
+        lineNumbers = this.numberLines(lines, lineNumbers, firstLine);
+        if (filtered) {
+            lines = lines.map((text, i) => `L${lineNumbers[i]} | ${text}`);
+        }
+
         if (this.isPaused) {
-            this.pauseBuffer.push(...lines);
+            for (let i = 0; i < lines.length; i++) {
+                this.pauseBuffer.push([lines[i], lineNumbers[i], ROW_LINE]);
+            }
             this.updatePendingCount();
         } else {
-            this.appendBatch(lines);
+            this.appendBatch(lines, lineNumbers);
         }
     }
 
-    appendBatch(lines) {
-        // Add to in-memory buffer
-        this.lines.push(...lines);
+    appendBatch(lines, lineNumbers = null, kind = ROW_LINE, shouldScroll = true) {
+        // Add to the ring buffer; the oldest rows are evicted once it is full
+        for (let i = 0; i < lines.length; i++) {
+            this.buffer.push(lines[i], kind, lineNumbers ? lineNumbers[i] : 0);
+        }
+        this.filterWorker.postMessage({ type: 'append', texts: lines, kind });
         
         // Update end line when receiving new lines
         if (this.isLive) {
             this.currentEndLine = this.totalLines;
         }
         
-        // Trim if exceeded max lines (circular buffer)
-        if (this.lines.length > this.maxLines) {
-            const excess = this.lines.length - this.maxLines;
-            this.lines.splice(0, excess);
-        }
-        
-        // Render in chunks to avoid blocking UI
-        this.renderLines(lines);
+        // Rendering happens once per animation frame, however many batches arrive
+        this.viewport.scheduleRender();
+        if (shouldScroll) this.scrollToBottom();
         this.updateFileInfo();
         this.updateNavigationButtons();
     }
 
-    appendLog(text, extraClass = '') {
-        // Add to in-memory buffer
-        this.lines.push(text);
-        
-        // Trim if exceeded max lines
-        if (this.lines.length > this.maxLines) {
-            this.lines.shift();
-            // Remove oldest DOM element if needed
-            const firstChild = this.dom.logContainer.firstElementChild;
-            if (firstChild && firstChild.classList.contains('py-0.5')) {
-                firstChild.remove();
+    appendLog(text, kind = ROW_SYS) {
+        this.appendBatch([text], null, kind);
+    }
+
+    clearLines() {
+        this.buffer.clear();
+        this.filterWorker.postMessage({ type: 'clear' });
+        this.viewport.reset();
+        if (this.filterTerm) this.viewport.setView([]);
+    }
+
+    rowClass(seq) {
+        const kind = this.buffer.kind(seq);
+        if (kind === ROW_DIVIDER) {
+            return 'log-row px-3 text-center text-xs text-blue-500 font-bold uppercase tracking-widest';
+        }
+        const cls = 'log-row px-3 hover:bg-gray-800';
+        if (kind === ROW_SYS) return `${cls} text-gray-500 italic`;
+        if (kind === ROW_MATCH) return `${cls} text-blue-400 cursor-pointer`;
+
+        // Syntax Highlighting (level codes come from the filter worker)
+        return `${cls} ${LEVEL_CLASSES[this.buffer.level(seq)]}`;
+    }
+
+    handleWorkerMessage(msg) {
+        if (msg.type === 'levels') {
+            for (let i = 0; i < msg.levels.length; i++) {
+                const seq = msg.seq + i;
+                if (this.buffer.has(seq)) this.buffer.levels[this.buffer.slot(seq)] = msg.levels[i];
             }
+            this.viewport.refresh();
+            return;
         }
-        
-        // Render single line to DOM
-        const el = this.createLogElement(text, extraClass);
-        if (el) {
-            this.dom.logContainer.appendChild(el);
-            this.scrollToBottom();
+
+        // Answers to an older filter are stale
+        if (msg.id !== this.filterId || !this.filterTerm) return;
+        if (msg.type === 'filterError') {
+            this.updateStatus(msg.error, 'bg-red-600');
+        }
+        else if (msg.type === 'matches') {
+            if (msg.prepend) {
+                // Older history: keep the rows on screen in place
+                this.viewport.view.unshift(...msg.seqs);
+                this.viewport.scrollBy(msg.seqs.length);
+            } else if (msg.first) {
+                this.viewport.setView(msg.seqs);
+            } else {
+                this.viewport.view.push(...msg.seqs);
+                this.viewport.scheduleRender();
+                if (this.isLive) this.scrollToBottom();
+            }
         }
     }
 
-    createLogElement(text, extraClass = '') {
-        // Content Filtering
-        const isHidden = this.filterTerm && !text.toLowerCase().includes(this.filterTerm);
-        
-        const div = document.createElement('div');
-        div.className = `py-1 px-3 hover:bg-gray-800 border-b border-transparent hover:border-gray-700 ${extraClass} ${isHidden ? 'hidden' : ''}`;
-        
-        // Syntax Highlighting
-        if (text.includes('ERROR') || text.includes('CRITICAL')) div.classList.add('text-red-400');
-        else if (text.includes('WARN')) div.classList.add('text-yellow-400');
-        else if (text.includes('INFO')) div.classList.add('text-blue-400');
-        else if (text.includes('SUCCESS')) div.classList.add('text-green-400');
-        
-        div.textContent = text;
-        return div;
+    appendDivider(label = 'Live Stream Started') {
+        this.appendBatch([`── ${label} ──`], null, ROW_DIVIDER);
     }
 
-    appendDivider() {
-        const div = document.createElement('div');
-        div.className = "flex items-center my-4 text-xs text-blue-500 font-bold uppercase tracking-widest";
-        div.innerHTML = `<div class="flex-grow border-t border-blue-900"></div><span class="mx-4">Live Stream Started</span><div class="flex-grow border-t border-blue-900"></div>`;
-        this.dom.logContainer.appendChild(div);
-        this.scrollToBottom();
+    handleRotation(reason) {
+        // Lines above the divider belong to the previous file; line numbers restart
+        this.appendDivider(reason === 'truncated' ? 'File Truncated' : 'File Rotated');
+        this.totalLines = 0;
+        this.nextLineNo = 1;
+        this.currentStartLine = 1;
+        this.currentEndLine = 0;
+        this.isAtTop = true;
+        this.updateFileInfo();
+        this.updateNavigationButtons();
     }
 
     togglePause() {
@@ -475,17 +621,20 @@ class LogViewer {
         const btn = this.dom.pauseBtn;
         const label = this.dom.pauseLabel;
         
+        // The server holds back live lines while paused, so only frames already in flight land in pauseBuffer
+        this.sendControl({ type: this.isPaused ? 'pause' : 'resume' });
+
         if (this.isPaused) {
             btn.classList.add('bg-yellow-700', 'border-yellow-500', 'text-white');
             btn.classList.remove('bg-gray-700');
             if (label) label.textContent = "Resume";
             document.getElementById('pauseIcon').textContent = "▶";
         } else {
-            if (this.pauseBuffer.length > 0) {
-                this.appendBatch(this.pauseBuffer);
-                this.pauseBuffer = [];
-                this.updatePendingCount();
+            for (const [text, lineNo, kind] of this.pauseBuffer) {
+                this.appendBatch([text], lineNo ? [lineNo] : null, kind);
             }
+            this.pauseBuffer = [];
+            this.updatePendingCount();
             btn.classList.remove('bg-yellow-700', 'border-yellow-500', 'text-white');
             btn.classList.add('bg-gray-700');
             if (label) label.textContent = "Pause";
@@ -504,62 +653,34 @@ class LogViewer {
     }
 
     applyFilter(term) {
-        this.filterTerm = term.toLowerCase();
+        this.filterTerm = term;
+
+        // The server filters the live stream too, so non-matching lines are never sent
+        if (this.isLive && !this.isSearchMode) {
+            this.sendControl(this.liveFilterMessage());
+        }
         
-        // If no filter, show all
+        // The worker answers with matching rows a chunk at a time; until the
+        // first chunk arrives the previous view stays on screen
+        this.filterId++;
+        this.filterWorker.postMessage({ type: 'filter', id: this.filterId, term: this.filterTerm });
         if (!this.filterTerm) {
-            const logs = this.dom.logContainer.children;
-            for (let div of logs) {
-                if (div.classList.contains('py-1')) {
-                    div.classList.remove('hidden');
-                }
-            }
-            return;
+            this.viewport.setView(null);
         }
-        
-        // Filter in-memory lines and re-render (faster than DOM manipulation)
-        const filtered = this.lines.filter(line => 
-            line.toLowerCase().includes(this.filterTerm)
-        );
-        
-        // Clear and render filtered results
-        this.dom.logContainer.innerHTML = '';
-        this.renderLines(filtered, false); // Don't scroll during filter
     }
 
-    renderLines(lines, shouldScroll = true) {
-        // Render lines in chunks to avoid blocking
-        const frag = document.createDocumentFragment();
-        let count = 0;
-        
-        for (const text of lines) {
-            const el = this.createLogElement(text);
-            if (el) frag.appendChild(el);
-            
-            // Yield control every N lines
-            if (++count % this.renderChunkSize === 0) {
-                this.dom.logContainer.appendChild(frag);
-                // Small delay to let browser breathe
-                if (lines.length > 1000) {
-                    setTimeout(() => {}, 0);
-                }
-            }
-        }
-        
-        // Append remaining
-        if (frag.childNodes.length > 0) {
-            this.dom.logContainer.appendChild(frag);
-        }
-        
-        if (shouldScroll) this.scrollToBottom();
+    liveFilterMessage() {
+        // "/pattern/" filters with a regular expression and "where: ..." on parsed fields, like the search box
+        const where = fieldFilter(this.filterTerm);
+        if (where) return { type: 'filter', where };
+        const regexMatch = this.filterTerm.match(/^\/(.+)\/$/);
+        if (regexMatch) return { type: 'filter', q: regexMatch[1], regex: true };
+        return { type: 'filter', q: this.filterTerm };
     }
     
     scrollToBottom() {
         if (!this.isUserScrolling) {
-            // Use RAF for smooth scrolling
-            requestAnimationFrame(() => {
-                this.dom.logContainer.scrollTop = this.dom.logContainer.scrollHeight;
-            });
+            this.viewport.scrollToBottom();
         }
     }
 
@@ -610,8 +731,10 @@ class LogViewer {
             return;
         }
         
-        // Simplified: just show size and total lines
-        const info = `${this.fileSizeHuman} • ${this.totalLines.toLocaleString()} lines`;
+        // Size, total lines and the file lines currently on screen
+        let info = `${this.fileSizeHuman} • ${this.totalLines.toLocaleString()} lines`;
+        const range = this.viewport.visibleLineRange();
+        if (range) info += ` • L${range[0].toLocaleString()}–${range[1].toLocaleString()}`;
         this.dom.fileInfo.textContent = info;
     }
     
@@ -660,13 +783,11 @@ class LogViewer {
             this.isAtBottom = false;
             
             // Clear and render
-            this.dom.logContainer.innerHTML = '';
-            this.lines = data.lines;
+            this.clearLines();
             this.currentStartLine = data.start_line;
             this.currentEndLine = data.end_line;
             
-            this.renderLines(data.lines, false);
-            this.dom.logContainer.scrollTop = 0;
+            this.appendBatch(data.lines, this.lineRange(data.start_line, data.lines.length), ROW_LINE, false);
             
             this.updateFileInfo();
             this.updateNavigationButtons();
@@ -697,68 +818,112 @@ class LogViewer {
             return;
         }
 
+        // Cancel a search that is still streaming
+        if (this.searchAbort) this.searchAbort.abort();
+        const abort = new AbortController();
+        this.searchAbort = abort;
+
+        // "/pattern/" searches with a regular expression; "where: level=ERROR latency_ms>1000" filters on parsed fields
+        const params = new URLSearchParams({ limit: 300, stream: 1 });
+        const regexMatch = term.match(/^\/(.+)\/$/);
+        const where = fieldFilter(term);
+        if (where) {
+            params.set('where', where);
+        } else if (regexMatch) {
+            params.append('q', regexMatch[1]);
+            params.set('regex', 1);
+        } else {
+            params.append('q', term);
+        }
+
         this.showLoading(true);
+        let started = false;
 
         try {
-            const response = await fetch(`/api/logs/${encodeURIComponent(this.currentAlias)}/search?q=${encodeURIComponent(term)}&limit=300`);
-            const data = await response.json();
+            const response = await fetch(`/api/logs/${encodeURIComponent(this.currentAlias)}/search?${params}`, { signal: abort.signal });
+            let summary = null;
 
-            if (data.error) {
-                this.updateStatus('Search failed', 'bg-red-600');
-                return;
-            }
+            await this.readNdjson(response, (msg) => {
+                if (msg.error) {
+                    throw new Error(msg.error);
+                }
+                if (msg.done) {
+                    summary = msg;
+                    return;
+                }
+                if (!started) {
+                    this.enterSearchMode(term);
+                    started = true;
+                }
+                this.searchResults.push(msg);
+                this.appendBatch([`L${msg.line} | ${msg.text}`], [msg.line], ROW_MATCH, false);
+            });
 
-            if (this.ws) {
-                this.ws.close();
-                this.ws = null;
+            if (!started) {
+                this.enterSearchMode(term);
+                this.appendLog(`No matches found for: ${term}`);
             }
 
-            this.isLive = false;
-            this.isAtBottom = false;
-            this.isSearchMode = true;
-            this.lastSearchQuery = term;
-
-            this.searchResults = data.matches || [];
-            this.dom.logContainer.innerHTML = '';
-            this.lines = this.searchResults.map(match => `L${match.line} | ${match.text}`);
-
-            if (this.searchResults.length === 0) {
-                this.appendLog(`No matches found for: ${term}`, 'text-gray-500 italic');
-            } else {
-                this.renderSearchResults(this.searchResults, term);
-            }
-
-            this.currentStartLine = 1;
-            this.currentEndLine = this.totalLines;
-            this.updateFileInfo();
-            this.updateNavigationButtons();
-
-            const suffix = data.truncated ? ' (truncated)' : '';
-            this.updateStatus(`Found ${data.count} matches${suffix}. Click a match to open context.`, 'bg-blue-600');
+            const count = summary ? summary.count : this.searchResults.length;
+            const suffix = summary && summary.truncated ? ' (truncated)' : '';
+            this.updateStatus(`Found ${count} matches${suffix}. Click a match to open context.`, 'bg-blue-600');
         } catch (error) {
+            if (error.name === 'AbortError') return;
             console.error('Error searching log:', error);
             this.updateStatus('Search failed', 'bg-red-600');
         } finally {
-            this.showLoading(false);
+            if (this.searchAbort === abort) {
+                this.searchAbort = null;
+                this.showLoading(false);
+            }
         }
     }
 
-    renderSearchResults(matches, term) {
-        this.dom.logContainer.innerHTML = '';
-        const frag = document.createDocumentFragment();
+    async readNdjson(response, onMessage) {
+        // Parse a streamed NDJSON body (a plain JSON error body parses as one message)
+        const reader = response.body.getReader();
+        const decoder = new TextDecoder();
+        let buffer = '';
+
+        while (true) {
+            const { done, value } = await reader.read();
+            if (done) break;
+            buffer += decoder.decode(value, { stream: true });
+
+            let newline;
+            while ((newline = buffer.indexOf('\n')) >= 0) {
+                const line = buffer.slice(0, newline);
+                buffer = buffer.slice(newline + 1);
+                if (line) onMessage(JSON.parse(line));
+            }
+        }
+
+        buffer += decoder.decode();
+        if (buffer.trim()) onMessage(JSON.parse(buffer));
+    }
 
-        for (const match of matches) {
-            const row = document.createElement('button');
-            row.type = 'button';
-            row.className = 'w-full text-left py-1 px-3 hover:bg-gray-800 border-b border-transparent hover:border-gray-700 text-blue-400';
-            row.textContent = `L${match.line} | ${match.text}`;
-            row.title = `Open context around line ${match.line}`;
-            row.addEventListener('click', () => this.openSearchContext(match.line, term));
-            frag.appendChild(row);
+    enterSearchMode(term) {
+        if (this.ws) {
+            this.ws.close();
+            this.ws = null;
         }
 
-        this.dom.logContainer.appendChild(frag);
-        this.dom.logContainer.scrollTop = 0;
+        this.isLive = false;
+        this.isAtBottom = false;
+        this.isSearchMode = true;
+        this.lastSearchQuery = term;
+
+        this.searchResults = [];
+        this.clearLines();
+
+        this.currentStartLine = 1;
+        this.currentEndLine = this.totalLines;
+        this.updateFileInfo();
+        this.updateNavigationButtons();
+    }
+
+    lineRange(start, count) {
+        return Array.from({ length: count }, (_, i) => start + i);
     }
 
     async openSearchContext(lineNumber, term) {
@@ -775,36 +940,70 @@ class LogViewer {
                 return;
             }
 
-            this.isLive = false;
-            this.isAtBottom = false;
-            this.isSearchMode = true;
+            this.showContextPage(data, lineNumber);
+            this.updateStatus(`Showing context around L${lineNumber} for "${term}"`, 'bg-blue-600');
+        } catch (error) {
+            console.error('Error loading search context:', error);
+            this.updateStatus('Unable to load context', 'bg-red-600');
+        } finally {
+            this.showLoading(false);
+        }
+    }
 
-            this.currentStartLine = data.start_line;
-            this.currentEndLine = data.end_line;
+    async jumpToTime(at) {
+        // Load the page around the first line stamped at or after `at`
+        at = at.trim();
+        if (!this.currentAlias || !at) return;
 
-            const contextual = data.lines.map((text, idx) => `L${data.start_line + idx} | ${text}`);
-            this.lines = contextual;
-            this.dom.logContainer.innerHTML = '';
-            this.renderLines(contextual, false);
+        this.showLoading(true);
 
-            const matchIndex = Math.max(0, lineNumber - data.start_line);
-            const matchElement = this.dom.logContainer.children[matchIndex];
-            if (matchElement) {
-                matchElement.classList.add('bg-blue-900/40', 'border-blue-500');
-                matchElement.scrollIntoView({ block: 'center' });
+        try {
+            const response = await fetch(`/api/logs/${encodeURIComponent(this.currentAlias)}/history?direction=time&at=${encodeURIComponent(at)}&count=120`);
+            const data = await response.json();
+
+            if (data.error) {
+                this.updateStatus(data.error, 'bg-red-600');
+                return;
             }
 
-            this.updateFileInfo();
-            this.updateNavigationButtons();
-            this.updateStatus(`Showing context around L${lineNumber} for "${term}"`, 'bg-blue-600');
+            // Like search mode: stop live lines from piling up under the page
+            if (this.ws) {
+                this.ws.close();
+                this.ws = null;
+            }
+            this.showContextPage(data, data.target_line);
+            this.updateStatus(`Jumped to ${data.target_time} (L${data.target_line})`, 'bg-blue-600');
         } catch (error) {
-            console.error('Error loading search context:', error);
-            this.updateStatus('Unable to load context', 'bg-red-600');
+            console.error('Error jumping to time:', error);
+            this.updateStatus('Unable to jump to time', 'bg-red-600');
         } finally {
             this.showLoading(false);
         }
     }
 
+    showContextPage(data, lineNumber) {
+        // Replace the view with a /history page and highlight lineNumber in it
+        this.isLive = false;
+        this.isAtBottom = false;
+        this.isSearchMode = true;
+
+        this.currentStartLine = data.start_line;
+        this.currentEndLine = data.end_line;
+
+        const contextual = data.lines.map((text, idx) => `L${data.start_line + idx} | ${text}`);
+        this.clearLines();
+        this.appendBatch(contextual, this.lineRange(data.start_line, contextual.length), ROW_LINE, false);
+
+        const matchIndex = this.viewport.indexOfLine(lineNumber);
+        if (matchIndex >= 0) {
+            this.viewport.highlightSeq = this.viewport.seqAt(matchIndex);
+            this.viewport.scrollToIndex(matchIndex);
+        }
+
+        this.updateFileInfo();
+        this.updateNavigationButtons();
+    }
+
     downloadCurrentLog() {
         if (!this.currentAlias) {
             this.updateStatus('Select a log first', 'bg-yellow-600');
@@ -860,22 +1059,17 @@ class LogViewer {
                 return;
             }
             
-            // Save scroll position
-            const container = this.dom.logContainer;
-            const oldScrollHeight = container.scrollHeight;
-            const oldScrollTop = container.scrollTop;
-            
-            // Prepend lines to buffer and DOM
-            this.lines.unshift(...data.lines);
-            this.currentStartLine = data.start_line;
-            this.isAtTop = !data.has_more;
-            
-            // Render at the beginning
-            this.prependLines(data.lines);
+            // Prepend lines to the buffer, newest first
+            let added = 0;
+            for (let i = data.lines.length - 1; i >= 0; i--) {
+                if (!this.buffer.unshift(data.lines[i], ROW_LINE, data.start_line + i)) break;
+                added++;
+            }
+            this.currentStartLine = data.start_line + data.lines.length - added;
+            this.isAtTop = !data.has_more || added < data.lines.length;
             
-            // Restore scroll position (adjust for new content)
-            const newScrollHeight = container.scrollHeight;
-            container.scrollTop = oldScrollTop + (newScrollHeight - oldScrollHeight);
+            // Keep the rows on screen in place
+            this.prependLines(data.lines.slice(data.lines.length - added));
             
             this.updateFileInfo();
             this.updateNavigationButtons();
@@ -890,20 +1084,10 @@ class LogViewer {
         }
     }
     
-    prependLines(lines) {
-        const frag = document.createDocumentFragment();
-        
-        for (const text of lines) {
-            const el = this.createLogElement(text);
-            if (el) frag.appendChild(el);
-        }
-        
-        // Prepend to container
-        if (this.dom.logContainer.firstChild) {
-            this.dom.logContainer.insertBefore(frag, this.dom.logContainer.firstChild);
-        } else {
-            this.dom.logContainer.appendChild(frag);
-        }
+    prependLines(texts) {
+        this.filterWorker.postMessage({ type: 'prepend', texts, kind: ROW_LINE });
+        // With a filter active, the worker reports which of these rows are shown
+        if (!this.filterTerm) this.viewport.scrollBy(texts.length);
     }
     
     async loadNewerHistory() {
@@ -925,8 +1109,6 @@ class LogViewer {
                 return;
             }
             
-            // Append lines to buffer and DOM
-            this.lines.push(...data.lines);
             this.currentEndLine = data.end_line;
             
             // Check if we've reached the end
@@ -936,8 +1118,8 @@ class LogViewer {
                 return;
             }
             
-            // Render at the end
-            this.renderLines(data.lines, false);
+            // Append lines to the buffer
+            this.appendBatch(data.lines, this.lineRange(data.start_line, data.lines.length), ROW_LINE, false);
             
             this.updateFileInfo();
             this.updateNavigationButtons();
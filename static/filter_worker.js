@@ -0,0 +1,116 @@
+// Filtering and level classification off the main thread.
+//
+// The worker mirrors the viewer's LineBuffer (same capacity, same sequence
+// numbers) from append/prepend/clear messages, classifies every new row by
+// log level and answers filter requests with matching seqs, a chunk at a
+// time, so typing in the filter box never blocks rendering.
+
+importScripts('/static/virtual_log.js');
+
+const SCAN_CHUNK = 20000; // rows matched between yields to the message queue
+
+// Level codes sent back to the viewer (0: none)
+const LEVEL_ERROR = 1;
+const LEVEL_WARN = 2;
+const LEVEL_INFO = 3;
+const LEVEL_SUCCESS = 4;
+
+let buffer = null;
+let filter = null; // { id, test, scanned } while a filter is active
+
+function classifyLevel(text) {
+    if (text.includes('ERROR') || text.includes('CRITICAL')) return LEVEL_ERROR;
+    if (text.includes('WARN')) return LEVEL_WARN;
+    if (text.includes('INFO')) return LEVEL_INFO;
+    if (text.includes('SUCCESS')) return LEVEL_SUCCESS;
+    return 0;
+}
+
+function compileFilter(term) {
+    // Field conditions need the log's parser; the server applies them to live lines
+    if (fieldFilter(term)) return () => true;
+    // "/pattern/" filters with a regular expression, like the search box
+    const regexMatch = term.match(/^\/(.+)\/$/);
+    if (regexMatch) {
+        const regex = new RegExp(regexMatch[1], 'i');
+        return (text) => regex.test(text);
+    }
+    const needle = term.toLowerCase();
+    return (text) => text.toLowerCase().includes(needle);
+}
+
+function matches(seq) {
+    // Dividers stay visible so filtered output keeps its landmarks
+    return buffer.kind(seq) === ROW_DIVIDER || filter.test(buffer.text(seq));
+}
+
+function matchRange(from, to) {
+    const seqs = [];
+    for (let seq = Math.max(from, buffer.start); seq < to; seq++) {
+        if (matches(seq)) seqs.push(seq);
+    }
+    return seqs;
+}
+
+function scan(current) {
+    // Match from where the last chunk stopped up to the current end; rows
+    // appended meanwhile are picked up by later chunks, so seqs stay sorted
+    if (filter !== current) return;
+    const from = Math.max(current.scanned, buffer.start);
+    const to = Math.min(buffer.end, from + SCAN_CHUNK);
+    const seqs = matchRange(from, to);
+    current.scanned = to;
+    const done = to >= buffer.end;
+    postMessage({ type: 'matches', id: current.id, seqs, first: current.first, done });
+    current.first = false;
+    if (!done) setTimeout(() => scan(current), 0);
+}
+
+function classify(firstSeq, count) {
+    const levels = new Uint8Array(count);
+    for (let i = 0; i < count; i++) levels[i] = classifyLevel(buffer.text(firstSeq + i));
+    postMessage({ type: 'levels', seq: firstSeq, levels }, [levels.buffer]);
+}
+
+onmessage = (e) => {
+    const msg = e.data;
+    if (msg.type === 'init') {
+        buffer = new LineBuffer(msg.capacity);
+    }
+    else if (msg.type === 'append') {
+        const first = buffer.end;
+        for (const text of msg.texts) buffer.push(text, msg.kind);
+        classify(first, msg.texts.length);
+        // While a scan is still running it will reach these rows itself
+        if (filter && filter.scanned >= first) {
+            filter.scanned = buffer.end;
+            postMessage({ type: 'matches', id: filter.id, seqs: matchRange(first, buffer.end), first: false, done: true });
+        }
+    }
+    else if (msg.type === 'prepend') {
+        // texts are oldest first; the viewer only sends what fit in its buffer
+        for (let i = msg.texts.length - 1; i >= 0; i--) buffer.unshift(msg.texts[i], msg.kind);
+        classify(buffer.start, msg.texts.length);
+        if (filter) {
+            postMessage({ type: 'matches', id: filter.id, seqs: matchRange(buffer.start, buffer.start + msg.texts.length), prepend: true });
+        }
+    }
+    else if (msg.type === 'clear') {
+        buffer.clear();
+        // Seqs keep counting after a clear, so new rows start at buffer.end
+        if (filter) filter.scanned = buffer.start;
+    }
+    else if (msg.type === 'filter') {
+        filter = null;
+        if (!msg.term) return;
+        let test;
+        try {
+            test = compileFilter(msg.term);
+        } catch (err) {
+            postMessage({ type: 'filterError', id: msg.id, error: `Invalid regex: ${err.message}` });
+            return;
+        }
+        filter = { id: msg.id, test, scanned: buffer.start, first: true };
+        scan(filter);
+    }
+};
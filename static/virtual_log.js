@@ -0,0 +1,270 @@
+// Virtualized log viewport: the session history lives in a ring buffer and
+// only the rows currently on screen (plus a small overscan) exist in the DOM.
+
+const ROW_LINE = 0;     // log line
+const ROW_SYS = 1;      // status message from ezlog
+const ROW_DIVIDER = 2;  // "Live Stream Started", "File Rotated", ...
+const ROW_MATCH = 3;    // clickable full-file search result
+
+// Browsers cap element heights (~17M px in Firefox); taller content is scrolled proportionally
+const MAX_SCROLL_PX = 15000000;
+
+function fieldFilter(term) {
+    // Conditions on parsed fields are explicit: "where: level=ERROR latency_ms>1000".
+    // Returns the conditions, or null for plain text.
+    const match = term.match(/^where:\s*(.+)$/i);
+    return match ? match[1].trim() : null;
+}
+
+class LineBuffer {
+    // Fixed-capacity ring of rows addressed by sequence number. Sequence
+    // numbers only grow (or shrink below start when older history is
+    // prepended), so a seq keeps pointing at the same row until it is evicted.
+    constructor(capacity) {
+        this.capacity = capacity;
+        this.texts = new Array(capacity);
+        this.kinds = new Uint8Array(capacity);
+        this.lineNos = new Float64Array(capacity); // file line number, 0 if none
+        this.levels = new Uint8Array(capacity);    // level code from the filter worker, 0 if none
+        this.start = 0; // seq of the oldest row
+        this.end = 0;   // seq after the newest row
+    }
+
+    get length() {
+        return this.end - this.start;
+    }
+
+    slot(seq) {
+        return ((seq % this.capacity) + this.capacity) % this.capacity;
+    }
+
+    push(text, kind = ROW_LINE, lineNo = 0) {
+        const i = this.slot(this.end);
+        this.texts[i] = text;
+        this.kinds[i] = kind;
+        this.lineNos[i] = lineNo;
+        this.levels[i] = 0;
+        this.end++;
+        // Full: the newest row just overwrote the oldest one
+        if (this.end - this.start > this.capacity) this.start++;
+    }
+
+    unshift(text, kind = ROW_LINE, lineNo = 0) {
+        // Older history never evicts newer rows
+        if (this.length >= this.capacity) return false;
+        this.start--;
+        const i = this.slot(this.start);
+        this.texts[i] = text;
+        this.kinds[i] = kind;
+        this.lineNos[i] = lineNo;
+        this.levels[i] = 0;
+        return true;
+    }
+
+    text(seq) { return this.texts[this.slot(seq)]; }
+    kind(seq) { return this.kinds[this.slot(seq)]; }
+    lineNo(seq) { return this.lineNos[this.slot(seq)]; }
+    level(seq) { return this.levels[this.slot(seq)]; }
+
+    has(seq) {
+        return seq >= this.start && seq < this.end;
+    }
+
+    clear() {
+        this.texts.fill(undefined); // release the strings
+        // Keep counting from here so late messages about old seqs can't hit new rows
+        this.start = this.end;
+    }
+}
+
+class VirtualLog {
+    // Renders a LineBuffer (or a filtered list of its seqs) into a scroll container.
+    // options.rowClass(seq) returns the class list of a row;
+    // options.onRowClick(seq) is called when a ROW_MATCH row is clicked.
+    constructor(container, buffer, options = {}) {
+        this.container = container;
+        this.buffer = buffer;
+        this.rowClass = options.rowClass || (() => 'log-row');
+        this.onRowClick = options.onRowClick || (() => {});
+        this.overscan = 20;
+
+        this.view = null;          // null: every row; otherwise ascending seqs to show
+        this.highlightSeq = null;
+        this.stickToBottom = false;
+        this.renderQueued = false;
+        this.scale = 1;
+
+        this.spacer = document.createElement('div');
+        this.spacer.className = 'relative w-full';
+        this.rowsEl = document.createElement('div');
+        this.rowsEl.className = 'absolute left-0 right-0 top-0';
+        this.spacer.appendChild(this.rowsEl);
+        container.appendChild(this.spacer);
+        this.rowHeight = this.measureRowHeight();
+
+        container.addEventListener('scroll', () => this.scheduleRender(), { passive: true });
+        window.addEventListener('resize', () => this.scheduleRender());
+        this.rowsEl.addEventListener('click', (e) => {
+            const row = e.target.closest('[data-seq]');
+            if (!row) return;
+            const seq = Number(row.dataset.seq);
+            if (this.buffer.kind(seq) === ROW_MATCH) this.onRowClick(seq);
+        });
+    }
+
+    measureRowHeight() {
+        const probe = document.createElement('div');
+        probe.className = 'log-row';
+        probe.textContent = 'X';
+        this.rowsEl.appendChild(probe);
+        const height = probe.offsetHeight || 22;
+        probe.remove();
+        return height;
+    }
+
+    get count() {
+        return this.view ? this.view.length : this.buffer.length;
+    }
+
+    seqAt(index) {
+        return this.view ? this.view[index] : this.buffer.start + index;
+    }
+
+    indexOfSeq(seq) {
+        if (!this.view) return seq - this.buffer.start;
+        // view is sorted: binary search
+        let lo = 0, hi = this.view.length;
+        while (lo < hi) {
+            const mid = (lo + hi) >> 1;
+            if (this.view[mid] < seq) lo = mid + 1; else hi = mid;
+        }
+        return lo;
+    }
+
+    setView(seqs) {
+        this.view = seqs;
+        this.scheduleRender();
+    }
+
+    reset() {
+        this.view = null;
+        this.highlightSeq = null;
+        this.container.scrollTop = 0;
+        this.refresh();
+    }
+
+    refresh() {
+        // Redraw every rendered row, e.g. after level codes arrived for them
+        for (const row of this.rowsEl.children) row.dataset.seq = '';
+        this.scheduleRender();
+    }
+
+    scheduleRender() {
+        if (this.renderQueued) return;
+        this.renderQueued = true;
+        requestAnimationFrame(() => {
+            this.renderQueued = false;
+            this.render();
+        });
+    }
+
+    scrollToBottom() {
+        this.stickToBottom = true;
+        this.scheduleRender();
+    }
+
+    scrollToIndex(index, align = 'center') {
+        this.stickToBottom = false;
+        const offset = align === 'center' ? (this.container.clientHeight - this.rowHeight) / 2 : 0;
+        this.container.scrollTop = Math.max(0, index * this.rowHeight * this.scale - offset);
+        this.scheduleRender();
+    }
+
+    scrollBy(rows) {
+        // Grow the spacer first so the new scroll position isn't clamped
+        this.updateHeight();
+        this.container.scrollTop += rows * this.rowHeight * this.scale;
+        this.scheduleRender();
+    }
+
+    indexOfLine(lineNo) {
+        // Index of the row showing file line lineNo, or -1
+        for (let i = this.count - 1; i >= 0; i--) {
+            if (this.buffer.lineNo(this.seqAt(i)) === lineNo) return i;
+        }
+        return -1;
+    }
+
+    firstVisibleIndex() {
+        return Math.floor(this.container.scrollTop / this.scale / this.rowHeight);
+    }
+
+    visibleLineRange() {
+        // [first, last] file line numbers on screen, or null
+        const count = this.count;
+        const first = Math.min(this.firstVisibleIndex(), count);
+        const last = Math.min(count, first + Math.ceil(this.container.clientHeight / this.rowHeight));
+        let from = 0, to = 0;
+        for (let i = first; i < last; i++) {
+            const lineNo = this.buffer.lineNo(this.seqAt(i));
+            if (!lineNo) continue;
+            if (!from) from = lineNo;
+            to = lineNo;
+        }
+        return from ? [from, to] : null;
+    }
+
+    updateHeight() {
+        if (this.view && this.view.length && this.view[0] < this.buffer.start) {
+            // Drop filtered seqs whose rows were evicted from the ring
+            this.view.splice(0, this.indexOfSeq(this.buffer.start));
+        }
+        const contentHeight = this.count * this.rowHeight;
+        const height = Math.min(contentHeight, MAX_SCROLL_PX);
+        const viewportHeight = this.container.clientHeight;
+        this.scale = contentHeight > height ? (height - viewportHeight) / Math.max(1, contentHeight - viewportHeight) : 1;
+        this.spacer.style.height = `${height}px`;
+        return height;
+    }
+
+    render() {
+        const container = this.container;
+        const height = this.updateHeight();
+        const count = this.count;
+        const viewportHeight = container.clientHeight;
+
+        if (this.stickToBottom) {
+            container.scrollTop = container.scrollHeight;
+            this.stickToBottom = false;
+        }
+
+        const scrollTop = Math.min(container.scrollTop, Math.max(0, height - viewportHeight));
+        const virtualTop = scrollTop / this.scale;
+        const visible = Math.ceil(viewportHeight / this.rowHeight) + 1;
+        const first = Math.max(0, Math.floor(virtualTop / this.rowHeight) - this.overscan);
+        const last = Math.min(count, Math.floor(virtualTop / this.rowHeight) + visible + this.overscan);
+
+        // Position the rendered slice where it would sit in the full list
+        const offset = scrollTop - (virtualTop - first * this.rowHeight);
+        this.rowsEl.style.transform = `translateY(${offset}px)`;
+
+        const rows = this.rowsEl.children;
+        const needed = last - first;
+        while (rows.length < needed) this.rowsEl.appendChild(document.createElement('div'));
+        while (rows.length > needed) this.rowsEl.lastChild.remove();
+
+        for (let i = 0; i < needed; i++) {
+            const seq = this.seqAt(first + i);
+            const row = rows[i];
+            const highlighted = seq === this.highlightSeq ? '1' : '';
+            // Rows never change once written, so a reused node showing the same seq is up to date
+            if (row.dataset.seq === String(seq) && (row.dataset.highlight || '') === highlighted) continue;
+            const text = this.buffer.text(seq);
+            row.dataset.seq = seq;
+            row.dataset.highlight = highlighted;
+            row.className = this.rowClass(seq) + (highlighted ? ' bg-blue-900/40' : '');
+            row.textContent = text;
+            row.title = text.length > 200 ? text.slice(0, 2000) : '';
+        }
+    }
+}
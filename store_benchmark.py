@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""Benchmark the JSON and SQLite tracked-logs stores.
+
+Runs against a throwaway HOME so your real ~/.ezlog is never touched:
+fills the JSON store with N aliases spread over P projects, times common
+operations, migrates to SQLite and times the same operations again.
+"""
+
+import os
+import sys
+import time
+import tempfile
+import argparse
+
+
+def timed(label, func, repeat=1):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = func()
+    elapsed = (time.perf_counter() - start) / repeat
+    print(f"  {label:32} {elapsed * 1000:10.2f} ms")
+    return result
+
+
+def run_operations(tl, data, sample_file, projects):
+    aliases = [alias for alias in data][:: max(1, len(data) // 10000)]
+
+    def cold_load():
+        tl.registry.invalidate()
+        return tl.load_tracked_logs()
+
+    def lookups():
+        for alias in aliases:
+            tl.get_log_path(alias)
+
+    def single_adds():
+        for i in range(100):
+            tl.add_tracked_log(f"bench.single{i}", sample_file)
+
+    def remove_projects():
+        for p in range(10):
+            tl.remove_project(f"project{p}")
+
+    def regroup():
+        tl.registry.invalidate()
+        return tl.registry.get_groups()
+
+    timed("cold load (all aliases)", cold_load)
+    timed(f"{len(aliases)} alias lookups", lookups)
+    timed("group by project", regroup)
+    timed("100 single adds", single_adds)
+    timed(f"remove 10 of {projects} projects", remove_projects)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark EZLog alias stores")
+    parser.add_argument("--aliases", type=int, default=100000, help="Number of aliases")
+    parser.add_argument("--projects", type=int, default=300, help="Number of projects")
+    args = parser.parse_args()
+
+    home = tempfile.mkdtemp(prefix="ezlog-store-bench-")
+    os.environ["HOME"] = home
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    import tracked_logs as tl
+
+    sample_file = os.path.join(home, "sample.log")
+    open(sample_file, "w").close()
+    data = {
+        f"project{i % args.projects}.log{i}": f"/var/log/project{i % args.projects}/app{i}.log"
+        for i in range(args.aliases)
+    }
+    print(f"{args.aliases} aliases in {args.projects} projects (HOME={home})")
+
+    print("\nJSON store:")
+    timed("bulk save", lambda: tl.save_tracked_logs(data))
+    run_operations(tl, data, sample_file, args.projects)
+
+    tl.save_tracked_logs(data)
+    print("\nSQLite store:")
+    timed("migrate from JSON", lambda: tl.migrate_store("sqlite"))
+    run_operations(tl, data, sample_file, args.projects)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,616 @@
+import os
+import re
+import mmap
+import queue
+import struct
+import threading
+from array import array
+from bisect import bisect_right
+from collections import OrderedDict
+
+from log_index import INDEX_DIR, HEAD_BYTES, index_path_for, get_line_index
+
+BLOCK_BYTES = 128 * 1024                # postings point to line-aligned blocks of about this size
+SEGMENT_BYTES = 4 * 1024 * 1024         # blocks are indexed (and persisted) a segment at a time
+MIN_FILE_BYTES = 16 * 1024 * 1024       # smaller files are scanned quickly enough without an index
+DEFAULT_MAX_MB = 128                    # per-file cap; the search_index_mb alias setting overrides it
+SAVE_EVERY_SEGMENTS = 16                # persist progress while building a large index
+MIN_WORD = 3                            # shorter query words match too many tokens to narrow anything
+MAX_CANDIDATE_SHARE = 0.5               # above this share of the indexed bytes a plain scan is faster
+MAX_TERM_INDEXES = 64                   # indexes kept loaded per process
+COMPACT_TO = 0.75                       # share of the cap kept when the index file is compacted
+
+# Tokens are lower-cased ASCII alphanumeric runs, so "SEARCH_TOKEN_42" is "search", "token", "42"
+_WORD = re.compile(rb"[a-z0-9]+")
+
+_MAGIC = b"EZTI"
+_VERSION = 2
+# magic, version, dev, ino, first indexed byte, indexed_size, newlines, segments,
+# offset of the first segment in the index file, head length (head follows, padded)
+_HEADER = struct.Struct("<4sIQQQQQQQH")
+# blocks, vocabulary bytes, tokens, postings
+_SEGMENT = struct.Struct("<IIII")
+
+
+def _aligned(n):
+    """n rounded up to a multiple of 8, so the arrays of a segment stay aligned"""
+    return n + (-n % 8)
+
+
+# Segments start here in the index file
+_RECORDS_AT = _aligned(_HEADER.size + HEAD_BYTES)
+
+
+def term_index_path(filepath):
+    """Return the on-disk search index location for a log file"""
+    return index_path_for(filepath).with_suffix(".terms")
+
+
+def query_words(query):
+    """What a matching line must contain, as an AND list of OR groups of word lists.
+
+    Each word must occur inside some token of the line (so partial words
+    at the edges of a term still match). Returns None when the index can't
+    narrow the query: regexes, non-ASCII case folding, or an OR term
+    without a word of at least MIN_WORD characters.
+    """
+    if query.text_mode:
+        return None
+
+    def words(needle):
+        return [w for w in set(_WORD.findall(needle.lower())) if len(w) >= MIN_WORD]
+
+    groups = []
+    alternatives = [words(m.needle) for m in query.matchers]
+    if query.match_all:
+        groups.extend([alt] for alt in alternatives if alt)
+    elif alternatives and all(alternatives):
+        groups.append(alternatives)
+    if query.levels:
+        alternatives = [words(lvl.encode("ascii", "ignore")) for lvl in query.levels]
+        if all(alternatives):
+            groups.append(alternatives)
+    if getattr(query.where_anchor, "needle", None):
+        alternative = words(query.where_anchor.needle)
+        if alternative:
+            groups.append([alternative])
+    return groups or None
+
+
+def _line_start(f, pos):
+    """Offset of the first line of f that starts at or after pos"""
+    if pos <= 0:
+        return 0
+    f.seek(pos - 1)
+    at = pos - 1
+    while True:
+        data = f.read(BLOCK_BYTES)
+        if not data:
+            return at
+        nl = data.find(b"\n")
+        if nl >= 0:
+            return at + nl + 1
+        at += len(data)
+
+
+class Segment:
+    """Inverted index of one run of blocks, stored at ``pos`` in the index file.
+
+    Only the block table is kept in memory: block ``b`` spans bytes
+    ``offsets[b]:offsets[b + 1]`` of the log and starts after ``lines[b]``
+    newlines; ``lines[-1]`` counts the newlines up to the end of the
+    segment. The postings are read from the mapped index file: the
+    segment's distinct tokens, sorted and joined by newlines, then for
+    each token ``t`` its start in that text (``starts[t]``) and the blocks
+    it occurs in, ``blocks[post_starts[t]:post_starts[t + 1]]``.
+    """
+
+    def __init__(self, pos, offsets, lines, vocab_len, ntokens, npostings):
+        self.pos = pos
+        self.offsets = offsets
+        self.lines = lines
+        self.vocab_len = vocab_len
+        self.ntokens = ntokens
+        self.npostings = npostings
+
+    @classmethod
+    def build(cls, data, base, newlines):
+        """Index newline-terminated bytes that start at file offset base after newlines newlines.
+
+        Returns the segment (not placed in the index file yet) and its record bytes.
+        """
+        offsets = array("Q", [base])
+        lines = array("Q")
+        postings = {}
+        pos = 0
+        while pos < len(data):
+            cut = data.find(b"\n", min(pos + BLOCK_BYTES, len(data)) - 1)
+            end = len(data) if cut < 0 else cut + 1
+            block = len(lines)
+            lines.append(newlines)
+            for token in set(_WORD.findall(data[pos:end].lower())):
+                found = postings.get(token)
+                if found is None:
+                    postings[token] = [block]
+                else:
+                    found.append(block)
+            newlines += data.count(b"\n", pos, end)
+            offsets.append(base + end)
+            pos = end
+        lines.append(newlines)
+
+        tokens = sorted(postings)
+        starts = array("I")
+        post_starts = array("I", [0])
+        blocks = array("H")
+        at = 0
+        for token in tokens:
+            starts.append(at)
+            at += len(token) + 1
+            blocks.extend(postings[token])
+            post_starts.append(len(blocks))
+        vocab = b"\n".join(tokens)
+        segment = cls(None, offsets, lines, len(vocab), len(starts), len(blocks))
+        record = b"".join([
+            _SEGMENT.pack(len(lines) - 1, len(vocab), len(starts), len(blocks)),
+            offsets.tobytes(), lines.tobytes(), vocab.ljust(_aligned(len(vocab)), b"\n"),
+            starts.tobytes(), post_starts.tobytes(), blocks.tobytes(),
+        ])
+        return segment, record.ljust(segment.nbytes, b"\0")
+
+    def _layout(self, pos):
+        """Offsets of the vocabulary, starts, post_starts and blocks, and the record end, for a record at pos"""
+        vocab = pos + _SEGMENT.size + 16 * len(self.offsets)
+        starts = vocab + _aligned(self.vocab_len)
+        post_starts = starts + 4 * self.ntokens
+        blocks = post_starts + 4 * (self.ntokens + 1)
+        return vocab, starts, post_starts, blocks, _aligned(blocks + 2 * self.npostings)
+
+    @property
+    def start(self):
+        return self.offsets[0]
+
+    @property
+    def end(self):
+        return self.offsets[-1]
+
+    @property
+    def nbytes(self):
+        """Size of the segment's record in the index file"""
+        return self._layout(0)[-1]
+
+    def moved(self, pos):
+        """The same segment stored at pos"""
+        return Segment(pos, self.offsets, self.lines, self.vocab_len, self.ntokens, self.npostings)
+
+    def match(self, mm, groups):
+        """Sorted blocks that may hold a line satisfying query_words() groups (mm maps the index file)"""
+        vocab, starts_at, post_at, blocks_at, _ = self._layout(self.pos)
+        vocab_end = vocab + self.vocab_len
+        view = memoryview(mm)
+        starts = view[starts_at:post_at].cast("I")
+        post_starts = view[post_at:blocks_at].cast("I")
+        blocks = view[blocks_at:blocks_at + 2 * self.npostings].cast("H")
+        nblocks = len(self.offsets) - 1
+
+        def blocks_with(word):
+            """Blocks containing a token that contains word"""
+            found = set()
+            pos = vocab
+            while True:
+                hit = mm.find(word, pos, vocab_end)
+                if hit < 0:
+                    break
+                t = bisect_right(starts, hit - vocab) - 1
+                found.update(blocks[post_starts[t]:post_starts[t + 1]])
+                if len(found) == nblocks:
+                    break
+                # One hit per token is enough
+                pos = vocab + starts[t + 1] if t + 1 < self.ntokens else vocab_end
+            return found
+
+        result = None
+        for alternatives in groups:
+            group = set()
+            for words in alternatives:
+                found = None
+                for word in words:
+                    hits = blocks_with(word)
+                    found = hits if found is None else found & hits
+                    if not found:
+                        break
+                group |= found
+            result = group if result is None else result & group
+            if not result:
+                return []
+        return sorted(result)
+
+    @classmethod
+    def read(cls, f):
+        """Read the block table of the segment at f's position and skip its postings"""
+        pos = f.tell()
+        nblocks, vocab_len, ntokens, npostings = _SEGMENT.unpack(f.read(_SEGMENT.size))
+        offsets, lines = array("Q"), array("Q")
+        offsets.fromfile(f, nblocks + 1)
+        lines.fromfile(f, nblocks + 1)
+        segment = cls(pos, offsets, lines, vocab_len, ntokens, npostings)
+        f.seek(pos + segment.nbytes)
+        return segment
+
+
+class TermIndex:
+    """Persistent token index of the newest part of one log file, for narrowing full-file searches.
+
+    Complete SEGMENT_BYTES runs of lines are indexed in file order and
+    appended to the index file, so a growing log only costs its new data.
+    The index covers bytes ``start:indexed_size`` and its file never grows
+    past the size cap: a fresh index starts as far before the end of the
+    file as the cap reaches, and when the next segment would not fit, the
+    oldest segments are evicted down to COMPACT_TO of the cap and the file
+    is rewritten. Searches read the candidate blocks of the indexed part and
+    scan the rest. Only block tables are kept in memory; postings are
+    read from the mapped index file.
+    """
+
+    def __init__(self, filepath):
+        self.filepath = filepath
+        self.lock = threading.Lock()        # guards the fields searches read
+        self.build_lock = threading.Lock()  # one refresh at a time
+        self._reset(0, 0)
+        self.full = False
+        self.max_bytes = 0
+
+    def _reset(self, dev, ino):
+        self.dev = dev
+        self.ino = ino
+        self.head = b""
+        self.start = 0
+        self.indexed_size = 0
+        self.newlines = 0
+        self.segments = []
+        self.nbytes = _RECORDS_AT
+        # Index file the segments are stored in (None: not written yet) and where it ends
+        self.file_ino = None
+        self.file_end = _RECORDS_AT
+
+    def _usable(self, st):
+        """Whether the indexed part still describes the file on disk"""
+        if (st.st_dev, st.st_ino) != (self.dev, self.ino) or st.st_size < self.indexed_size:
+            return False
+        with open(self.filepath, "rb") as f:
+            return f.read(len(self.head)) == self.head
+
+    def refresh(self, max_bytes):
+        """Index the complete segments appended since the last refresh (blocking)"""
+        with self.build_lock:
+            st = os.stat(self.filepath)
+            if not self._usable(st):
+                with self.lock:
+                    self._reset(st.st_dev, st.st_ino)
+            if max_bytes != self.max_bytes:
+                # A changed cap gets another try
+                self.full = False
+                self.max_bytes = max_bytes
+            self._evict(max_bytes)
+            added = 0
+            with open(self.filepath, "rb") as f:
+                if not self.head:
+                    self.head = f.read(min(HEAD_BYTES, st.st_size))
+                if not self.full and (self.start or st.st_size - self.indexed_size >= SEGMENT_BYTES):
+                    start = self._window_start(f, st.st_size, max_bytes)
+                    # Start over when all that is indexed would be evicted anyway, or
+                    # when a raised cap reaches back at least twice as far as the index
+                    if start > self.indexed_size or (self.start and start <= self.start - (self.indexed_size - self.start)):
+                        newlines = get_line_index(self.filepath).line_of(start) - 1
+                        with self.lock:
+                            self.segments = []
+                            self.nbytes = _RECORDS_AT
+                            self.start = self.indexed_size = start
+                            self.newlines = newlines
+                while not self.full and st.st_size - self.indexed_size >= SEGMENT_BYTES:
+                    f.seek(self.indexed_size)
+                    data = f.read(SEGMENT_BYTES)
+                    cut = data.rfind(b"\n")
+                    if cut < 0:
+                        # One line longer than a segment; stop here and let searches scan it
+                        break
+                    segment, record = Segment.build(data[:cut + 1], self.indexed_size, self.newlines)
+                    if _RECORDS_AT + len(record) > max_bytes:
+                        self.full = True
+                        break
+                    if self.file_end + len(record) > max_bytes:
+                        # The file (evicted records included) would pass the cap: drop the
+                        # oldest segments down to COMPACT_TO of it, so rewrites stay rare
+                        self._evict(int(max_bytes * COMPACT_TO) - len(record))
+                        self._rewrite()
+                    elif self.file_ino is None or (not self.segments and self.file_end > _RECORDS_AT):
+                        self._rewrite()
+                    segment.pos = self._append(record)
+                    with self.lock:
+                        if not self.segments:
+                            self.start = segment.start
+                        self.segments.append(segment)
+                        self.nbytes += len(record)
+                        self.indexed_size = segment.end
+                        self.newlines = segment.lines[-1]
+                    self._evict(max_bytes)
+                    added += 1
+                    if added % SAVE_EVERY_SEGMENTS == 0:
+                        self.save()
+            if self.file_ino is not None and self.file_end > max_bytes:
+                # The cap was lowered
+                self._rewrite()
+            self.save()
+        return self
+
+    def _window_start(self, f, size, max_bytes):
+        """First byte of the newest part of the file that an index of max_bytes can cover"""
+        with self.lock:
+            covered = self.indexed_size - self.start
+            used = self.nbytes - _RECORDS_AT
+        if not used:
+            # Learn how big this log's index gets from its last segment
+            f.seek(max(0, size - SEGMENT_BYTES))
+            data = f.read(SEGMENT_BYTES)
+            covered = len(data)
+            used = Segment.build(data, 0, 0)[0].nbytes
+        reach = (max_bytes - _RECORDS_AT) * covered // used
+        return _line_start(f, size - reach) if reach < size else 0
+
+    def _evict(self, max_bytes):
+        """Drop the oldest segments until the live ones fit in max_bytes (the file shrinks on _rewrite)"""
+        with self.lock:
+            while self.segments and self.nbytes > max_bytes:
+                self.nbytes -= self.segments.pop(0).nbytes
+                self.start = self.segments[0].start if self.segments else self.indexed_size
+
+    def coverage(self):
+        """(first indexed byte, end of the indexed part) of the log"""
+        with self.lock:
+            return self.start, self.indexed_size
+
+    def candidate_ranges(self, query):
+        """(start, end, first_line) byte ranges a search for query has to scan.
+
+        Covers the unindexed start of the file, the candidate blocks of the
+        indexed part and the unindexed rest of the file (end None). Returns
+        None when the index can't narrow the query or is out of date,
+        meaning: scan everything.
+        """
+        groups = query_words(query)
+        if groups is None:
+            return None
+        with self.lock:
+            segments = list(self.segments)
+            start, indexed_size, newlines = self.start, self.indexed_size, self.newlines
+            file_ino = self.file_ino
+        if not segments:
+            return None
+        try:
+            st = os.stat(self.filepath)
+            if not self._usable(st):
+                return None
+            with open(term_index_path(self.filepath), "rb") as f:
+                if os.fstat(f.fileno()).st_ino != file_ino:
+                    # Rewritten or dropped since these segments were read
+                    return None
+                mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            return None
+        if len(mm) < segments[-1].pos + segments[-1].nbytes:
+            return None
+
+        ranges = [(0, start, 1)] if start else []
+        scanned = 0
+        for segment in segments:
+            for b in segment.match(mm, groups):
+                block_start, block_end = segment.offsets[b], segment.offsets[b + 1]
+                scanned += block_end - block_start
+                if ranges and ranges[-1][1] == block_start:
+                    ranges[-1] = (ranges[-1][0], block_end, ranges[-1][2])
+                else:
+                    ranges.append((block_start, block_end, segment.lines[b] + 1))
+            if scanned > (indexed_size - start) * MAX_CANDIDATE_SHARE:
+                return None
+        ranges.append((indexed_size, None, newlines + 1))
+        return ranges
+
+    def _header(self, segments=None, file_end=None):
+        """Header describing the index, with segments stored as given (default: as they are)"""
+        with self.lock:
+            segments = self.segments if segments is None else segments
+            file_end = self.file_end if file_end is None else file_end
+            first = segments[0].pos if segments else file_end
+            return _HEADER.pack(
+                _MAGIC, _VERSION, self.dev, self.ino, self.start, self.indexed_size,
+                self.newlines, len(segments), first, len(self.head)
+            ) + self.head.ljust(_RECORDS_AT - _HEADER.size, b"\0")
+
+    def _rewrite(self):
+        """Replace the index file with one holding just the live segments"""
+        path = term_index_path(self.filepath)
+        tmp = path.with_suffix(f".{os.getpid()}.terms.tmp")
+        INDEX_DIR.mkdir(parents=True, exist_ok=True)
+        with self.lock:
+            segments = list(self.segments)
+        moved = []
+        try:
+            with open(tmp, "wb") as out:
+                out.write(bytes(_RECORDS_AT))
+                if segments:
+                    with open(path, "rb") as src:
+                        for segment in segments:
+                            src.seek(segment.pos)
+                            record = src.read(segment.nbytes)
+                            if len(record) != segment.nbytes:
+                                raise OSError("search index file is truncated")
+                            moved.append(segment.moved(out.tell()))
+                            out.write(record)
+                end = out.tell()
+                out.seek(0)
+                out.write(self._header(moved, end))
+            os.replace(tmp, path)
+            # Searches check file_ino, so they never pair these offsets with the old file
+            with self.lock:
+                self.segments = moved
+                self.file_end = end
+                self.file_ino = os.stat(path).st_ino
+        finally:
+            try:
+                os.remove(tmp)
+            except FileNotFoundError:
+                pass
+
+    def _append(self, record):
+        """Write a segment record at the end of the index file and return its offset"""
+        with open(term_index_path(self.filepath), "r+b") as f:
+            if os.fstat(f.fileno()).st_ino != self.file_ino:
+                raise OSError("search index file was replaced")
+            pos = self.file_end
+            f.seek(pos)
+            f.write(record)
+        self.file_end = pos + len(record)
+        return pos
+
+    def save(self):
+        """Update the header of the index file (segments are written as they are built)"""
+        if self.file_ino is None:
+            return
+        try:
+            with open(term_index_path(self.filepath), "r+b") as f:
+                if os.fstat(f.fileno()).st_ino == self.file_ino:
+                    # Segments are already on disk; a crash before this leaves the old, valid header
+                    f.write(self._header())
+        except OSError:
+            # The index is only a cache; a read-only home dir must not break searching
+            pass
+
+    @classmethod
+    def load(cls, filepath):
+        """Load a persisted index, or return an empty one if none is usable"""
+        index = cls(filepath)
+        try:
+            with open(term_index_path(filepath), "rb") as f:
+                (magic, version, dev, ino, start, indexed_size, newlines, count,
+                 first, head_len) = _HEADER.unpack(f.read(_HEADER.size))
+                if magic != _MAGIC or version != _VERSION:
+                    return index
+                head = f.read(HEAD_BYTES)[:head_len]
+                f.seek(first)
+                segments = [Segment.read(f) for _ in range(count)]
+                # Anything past here belongs to a segment the header was never updated for
+                file_end = f.tell()
+                st = os.fstat(f.fileno())
+                if file_end > st.st_size:
+                    return index
+        except (OSError, struct.error, EOFError, ValueError):
+            return index
+
+        index.dev, index.ino = dev, ino
+        index.head = head
+        index.start = start
+        index.indexed_size = indexed_size
+        index.newlines = newlines
+        index.segments = segments
+        index.nbytes += sum(segment.nbytes for segment in segments)
+        index.file_ino = st.st_ino
+        index.file_end = file_end
+        return index
+
+
+def _disk_state(filepath):
+    try:
+        st = os.stat(term_index_path(filepath))
+    except OSError:
+        return None
+    return (st.st_ino, st.st_mtime_ns, st.st_size)
+
+
+_indexes = OrderedDict()  # path -> (index file state when loaded or last saved, TermIndex)
+_indexes_lock = threading.Lock()
+
+
+def get_term_index(filepath):
+    """Return the shared search index of filepath as far as it is built (no indexing here).
+
+    Reloaded when the index file changed behind our back, e.g. after
+    `ezlog search-index --drop` or a rebuild from another process. Only
+    the MAX_TERM_INDEXES most recently used indexes stay loaded.
+    """
+    key = os.path.abspath(filepath)
+    state = _disk_state(key)
+    with _indexes_lock:
+        cached = _indexes.get(key)
+        if cached is not None and (cached[0] == state or cached[1].build_lock.locked()):
+            _indexes.move_to_end(key)
+            return cached[1]
+    index = TermIndex.load(key)
+    _remember(index, state)
+    return index
+
+
+def _remember(index, state=None):
+    state = _disk_state(index.filepath) if state is None else state
+    with _indexes_lock:
+        _indexes[index.filepath] = (state, index)
+        _indexes.move_to_end(index.filepath)
+        while len(_indexes) > MAX_TERM_INDEXES:
+            _indexes.popitem(last=False)
+
+
+_pending = queue.Queue()
+_scheduled = set()
+_scheduled_lock = threading.Lock()
+_builder = None
+
+
+def _build_forever():
+    while True:
+        filepath, max_bytes = _pending.get()
+        with _scheduled_lock:
+            _scheduled.discard(filepath)
+        try:
+            _remember(get_term_index(filepath).refresh(max_bytes))
+        except OSError:
+            pass
+        except Exception as e:
+            # A corrupt index or a bug must not stop indexing for every other log
+            print(f"Search index of {filepath} dropped: {e!r}")
+            try:
+                drop_term_index(filepath)
+            except OSError:
+                pass
+
+
+def schedule_term_index(filepath, max_bytes):
+    """Extend the search index of filepath on the background builder thread"""
+    global _builder
+    key = os.path.abspath(filepath)
+    with _scheduled_lock:
+        if key in _scheduled:
+            return
+        _scheduled.add(key)
+        if _builder is None:
+            _builder = threading.Thread(target=_build_forever, name="ezlog-term-index", daemon=True)
+            _builder.start()
+    _pending.put((key, max_bytes))
+
+
+def build_term_index(filepath, max_bytes):
+    """Build the search index of filepath from scratch in this thread and return it"""
+    drop_term_index(filepath)
+    index = TermIndex(os.path.abspath(filepath)).refresh(max_bytes)
+    _remember(index)
+    return index
+
+
+def drop_term_index(filepath):
+    """Delete the search index of filepath; returns whether there was one"""
+    key = os.path.abspath(filepath)
+    with _indexes_lock:
+        _indexes.pop(key, None)
+    try:
+        os.remove(term_index_path(key))
+        return True
+    except FileNotFoundError:
+        return False
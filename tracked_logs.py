@@ -1,63 +1,265 @@
 import json
 import os
+import threading
 import fnmatch
 from pathlib import Path
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 from collections import defaultdict
 
+try:
+    import fcntl
+except ImportError:
+    # No flock (e.g. Windows): writes stay atomic, just not serialized
+    fcntl = None
+
 # Always use hidden folder in user's home
 APP_DIR = Path.home() / ".ezlog"
 TRACKED_LOGS_FILE = APP_DIR / "tracked_logs.json"
+ALIAS_SETTINGS_FILE = APP_DIR / "alias_settings.json"
+STORE_LOCK_FILE = APP_DIR / "tracked_logs.lock"
+# Optional SQLite backend; used instead of the JSON file once this exists
+TRACKED_LOGS_DB = APP_DIR / "tracked_logs.db"
 
 
 def ensure_storage():
     """Ensure the JSON file exists"""
     APP_DIR.mkdir(parents=True, exist_ok=True)
-    if not TRACKED_LOGS_FILE.exists():
-        TRACKED_LOGS_FILE.write_text("{}")
+    try:
+        with open(TRACKED_LOGS_FILE, "x") as f:
+            f.write("{}")
+    except FileExistsError:
+        pass
+
+
+def write_json_atomic(path: Path, data):
+    """Write compact JSON to a temp file next to path, then rename it into place.
+
+    Readers see either the old or the new file, never a partial one.
+    """
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    try:
+        with open(tmp, "w") as f:
+            json.dump(data, f, separators=(",", ":"))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+
+
+@contextmanager
+def store_lock():
+    """Exclusive advisory lock serializing read-modify-write of the store across processes"""
+    APP_DIR.mkdir(parents=True, exist_ok=True)
+    with open(STORE_LOCK_FILE, "a") as f:
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+_sqlite_store = None
+_sqlite_store_lock = threading.Lock()
+
+
+def get_sqlite_store():
+    """Return the shared SQLiteStore when the SQLite backend is in use, else None"""
+    global _sqlite_store
+    try:
+        ino = os.stat(TRACKED_LOGS_DB).st_ino
+    except FileNotFoundError:
+        return None
+    with _sqlite_store_lock:
+        # Reopen if another process migrated away and back in the meantime
+        if _sqlite_store is None or _sqlite_store.ino != ino:
+            from sqlite_store import SQLiteStore
+            if _sqlite_store is not None:
+                _sqlite_store.close()
+            _sqlite_store = SQLiteStore(TRACKED_LOGS_DB)
+        return _sqlite_store
+
+
+def _close_sqlite_store():
+    global _sqlite_store
+    with _sqlite_store_lock:
+        if _sqlite_store is not None:
+            _sqlite_store.close()
+            _sqlite_store = None
+
+
+class TrackedLogsRegistry:
+    """Process-wide cache of the tracked logs store.
+
+    The parsed mapping, its project grouping and their JSON encodings are
+    kept in memory and only rebuilt when the store changes: a new inode,
+    mtime or size for tracked_logs.json, or a new data version for the
+    SQLite backend, e.g. after an `ezlog add` from another process.
+    Returned objects are shared and must not be modified.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        self.identity = None
+        self._set({})
+
+    def _set(self, logs):
+        self.logs = logs
+        self._groups = None
+        self._logs_json = None
+        self._groups_json = None
+
+    def _refresh(self):
+        store = get_sqlite_store()
+        if store is not None:
+            identity = ("sqlite", store.ino) + store.version()
+        else:
+            try:
+                st = os.stat(self.path)
+                identity = (st.st_ino, st.st_mtime_ns, st.st_size)
+            except FileNotFoundError:
+                identity = None
+        if identity == self.identity:
+            return
+        with self.lock:
+            if identity == self.identity:
+                return
+            logs = {}
+            if store is not None:
+                logs = store.load_all()
+            elif identity is not None:
+                with open(self.path, "r") as f:
+                    logs = json.load(f)
+            self._set(logs)
+            self.identity = identity
+
+    def get_logs(self) -> dict:
+        self._refresh()
+        return self.logs
+
+    def get_path(self, alias: str):
+        """Return the path tracked under alias, or None"""
+        return self.get_logs().get(alias)
+
+    def _ensure_groups(self):
+        if self._groups is None:
+            self._groups = group_logs_by_project(self.logs)
+        return self._groups
+
+    def get_groups(self) -> dict:
+        self._refresh()
+        with self.lock:
+            return self._ensure_groups()
+
+    def get_page_json(self):
+        """Return (aliases_json, groups_json) for the UI shell"""
+        self._refresh()
+        with self.lock:
+            if self._logs_json is None:
+                self._logs_json = json.dumps(self.logs)
+                self._groups_json = json.dumps(self._ensure_groups())
+            return self._logs_json, self._groups_json
+
+    def invalidate(self):
+        with self.lock:
+            self.identity = None
+
+
+registry = TrackedLogsRegistry(TRACKED_LOGS_FILE)
 
 
 def load_tracked_logs():
+    """Return a copy of the tracked logs that the caller may modify"""
+    return dict(registry.get_logs())
+
+
+def _write_tracked_logs(data: dict, before: dict = None):
+    store = get_sqlite_store()
+    if store is not None:
+        if before is None:
+            store.replace_all(data)
+        else:
+            store.apply_changes(before, data)
+        return
     ensure_storage()
-    with open(TRACKED_LOGS_FILE, "r") as f:
-        return json.load(f)
+    write_json_atomic(TRACKED_LOGS_FILE, data)
+    # A freed inode can be reused within the mtime granularity; force a reload
+    registry.invalidate()
 
 
 def save_tracked_logs(data: dict):
-    ensure_storage()
-    with open(TRACKED_LOGS_FILE, "w") as f:
-        json.dump(data, f, indent=2)
+    """Replace the whole store (use edit_tracked_logs for read-modify-write)"""
+    with store_lock():
+        _write_tracked_logs(data)
+
+
+@contextmanager
+def edit_tracked_logs():
+    """Yield the current tracked logs under the store lock; saved if the block succeeds"""
+    with store_lock():
+        data = load_tracked_logs()
+        before = dict(data)
+        yield data
+        _write_tracked_logs(data, before)
+
+
+def get_log_path(alias: str):
+    """O(1) alias lookup against the cached registry; None if not tracked"""
+    return registry.get_path(alias)
+
+
+def get_page_json():
+    """Cached (aliases_json, groups_json) strings for the UI shell"""
+    return registry.get_page_json()
 
 
 def exists_tracked_log(alias: str) -> bool:
-    return alias in load_tracked_logs()
+    return get_log_path(alias) is not None
 
 
 def add_tracked_log(alias: str, path: str):
-    data = load_tracked_logs()
-    if alias in data:
-        raise ValueError(f"Alias '{alias}' already exists")
     if not os.path.isfile(path):
         raise FileNotFoundError(f"Log file '{path}' not found")
-    data[alias] = os.path.abspath(path)
-    save_tracked_logs(data)
+    store = get_sqlite_store()
+    if store is not None:
+        store.add(alias, os.path.abspath(path))
+        return
+    with edit_tracked_logs() as data:
+        if alias in data:
+            raise ValueError(f"Alias '{alias}' already exists")
+        data[alias] = os.path.abspath(path)
 
 
 def update_tracked_log(alias: str, path: str):
-    data = load_tracked_logs()
-    if alias not in data:
-        raise ValueError(f"Alias '{alias}' does not exist")
     if not os.path.isfile(path):
         raise FileNotFoundError(f"Log file '{path}' not found")
-    data[alias] = os.path.abspath(path)
-    save_tracked_logs(data)
+    store = get_sqlite_store()
+    if store is not None:
+        store.update(alias, os.path.abspath(path))
+        return
+    with edit_tracked_logs() as data:
+        if alias not in data:
+            raise ValueError(f"Alias '{alias}' does not exist")
+        data[alias] = os.path.abspath(path)
 
 
 def remove_tracked_log(alias: str):
-    data = load_tracked_logs()
-    if alias not in data:
-        raise ValueError(f"Alias '{alias}' does not exist")
-    del data[alias]
-    save_tracked_logs(data)
+    store = get_sqlite_store()
+    if store is not None:
+        try:
+            store.remove_many([alias])
+        except ValueError:
+            raise ValueError(f"Alias '{alias}' does not exist")
+        return
+    with edit_tracked_logs() as data:
+        if alias not in data:
+            raise ValueError(f"Alias '{alias}' does not exist")
+        del data[alias]
 
 
 def parse_alias(alias: str):
@@ -83,7 +285,76 @@ def group_logs_by_project(data: dict) -> dict:
     return dict(groups)
 
 
-def add_folder(folder_path: str, project: str = None, pattern: str = "*.log", all_files: bool = False):
+def _scan_dir(path: str):
+    """List one directory as (file_paths, subdir_paths) using scandir's cached entry types"""
+    files, dirs = [], []
+    try:
+        with os.scandir(path) as entries:
+            for entry in entries:
+                try:
+                    # Directory symlinks are not followed, so loops can't happen
+                    if entry.is_dir(follow_symlinks=False):
+                        dirs.append(entry.path)
+                    elif entry.is_file():
+                        files.append(entry.path)
+                except OSError:
+                    continue
+    except OSError:
+        # Unreadable subfolders (common under /var/log) are skipped
+        pass
+    return files, dirs
+
+
+def _matches_any(rel_path: str, patterns) -> bool:
+    name = rel_path.rsplit("/", 1)[-1]
+    return any(fnmatch.fnmatch(name, p) or fnmatch.fnmatch(rel_path, p) for p in patterns)
+
+
+def scan_folder(folder: str, include=("*.log",), exclude=(), recursive: bool = False, workers: int = 1):
+    """Return sorted (relative_path, path) pairs for matching files under folder.
+
+    Patterns are matched against the file name and the relative path;
+    exclude patterns also prune matching subfolders. With workers > 1,
+    directories are listed on that many threads, which helps on slow
+    network filesystems.
+    """
+    folder = os.path.abspath(folder)
+    prefix = len(os.path.join(folder, ""))
+    found = []
+
+    def relative(path):
+        # scandir paths all start with folder, so slicing beats os.path.relpath
+        return path[prefix:].replace(os.sep, "/")
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        pending = {pool.submit(_scan_dir, folder)}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                files, dirs = future.result()
+                for path in files:
+                    rel = relative(path)
+                    if _matches_any(rel, include) and not _matches_any(rel, exclude):
+                        found.append((rel, path))
+                if recursive:
+                    for path in dirs:
+                        if not _matches_any(relative(path), exclude):
+                            pending.add(pool.submit(_scan_dir, path))
+
+    found.sort()
+    return found
+
+
+def add_folder(
+    folder_path: str,
+    project: str = None,
+    pattern: str = "*.log",
+    all_files: bool = False,
+    recursive: bool = False,
+    include: list = None,
+    exclude: list = None,
+    workers: int = 1
+):
     """Add all matching files from a folder as tracked logs.
     
     Args:
@@ -91,6 +362,10 @@ def add_folder(folder_path: str, project: str = None, pattern: str = "*.log", al
         project: Project name (uses folder name if None)
         pattern: Glob pattern to match files (default: *.log)
         all_files: If True, ignore pattern and add all files
+        recursive: Also scan subfolders; their names become part of the alias
+        include: Glob patterns to add (overrides pattern/all_files)
+        exclude: Glob patterns for files and subfolders to skip
+        workers: Threads used to list directories
     
     Returns:
         List of (alias, path) tuples that were added
@@ -100,30 +375,33 @@ def add_folder(folder_path: str, project: str = None, pattern: str = "*.log", al
         raise NotADirectoryError(f"Folder '{folder_path}' not found")
     
     resolved_project = project if project else folder.name
-    data = load_tracked_logs()
+    if not include:
+        include = ["*"] if all_files else [pattern]
+    files = scan_folder(str(folder), include, exclude or (), recursive=recursive, workers=workers)
+
+    existing = registry.get_logs()
+    candidates = []
+    for rel, path in files:
+        # Derive alias: project[.subfolder...].filename_without_ext
+        parts = rel.split("/")
+        alias = ".".join([resolved_project] + parts[:-1] + [os.path.splitext(parts[-1])[0]])
+        # Already tracked aliases cost one dict lookup, so re-runs are cheap
+        if alias not in existing:
+            candidates.append((alias, os.path.realpath(path)))
+    if not candidates:
+        return []
+
+    # Scan outside the lock; only the single batched write holds it
+    store = get_sqlite_store()
+    if store is not None:
+        return store.add_many(candidates)
     added = []
-    
-    # Determine files to add
-    if all_files:
-        files = list(folder.iterdir())
-    else:
-        files = []
-        for f in folder.iterdir():
-            if f.is_file() and fnmatch.fnmatch(f.name, pattern):
-                files.append(f)
-    
-    for f in sorted(files):
-        if not f.is_file():
-            continue
-        # Derive alias: project.filename_without_ext
-        stem = f.stem
-        alias = f"{resolved_project}.{stem}"
-        if alias in data:
-            continue  # skip duplicates
-        data[alias] = str(f.resolve())
-        added.append((alias, str(f.resolve())))
-    
-    save_tracked_logs(data)
+    with edit_tracked_logs() as data:
+        for alias, path in candidates:
+            if alias in data:
+                continue  # skip duplicates
+            data[alias] = path
+            added.append((alias, path))
     return added
 
 
@@ -131,24 +409,130 @@ def remove_tracked_logs_bulk(aliases: list):
     """Remove multiple tracked logs at once.
     Raises ValueError if any alias does not exist.
     """
-    data = load_tracked_logs()
-    missing = [a for a in aliases if a not in data]
-    if missing:
-        raise ValueError(f"Aliases not found: {', '.join(missing)}")
-    for alias in aliases:
-        del data[alias]
-    save_tracked_logs(data)
+    store = get_sqlite_store()
+    if store is not None:
+        store.remove_many(aliases)
+        return
+    with edit_tracked_logs() as data:
+        missing = [a for a in aliases if a not in data]
+        if missing:
+            raise ValueError(f"Aliases not found: {', '.join(missing)}")
+        for alias in aliases:
+            del data[alias]
 
 
 def remove_project(project: str):
     """Remove all logs belonging to a project group.
     Returns the number of removed aliases.
     """
-    data = load_tracked_logs()
-    to_remove = [alias for alias in data if parse_alias(alias)[0] == project]
-    if not to_remove:
-        raise ValueError(f"Project '{project}' not found")
-    for alias in to_remove:
-        del data[alias]
-    save_tracked_logs(data)
+    store = get_sqlite_store()
+    if store is not None:
+        return store.remove_project(project)
+    with edit_tracked_logs() as data:
+        to_remove = [alias for alias in data if parse_alias(alias)[0] == project]
+        if not to_remove:
+            raise ValueError(f"Project '{project}' not found")
+        for alias in to_remove:
+            del data[alias]
     return len(to_remove)
+
+
+def load_alias_settings() -> dict:
+    """Per-alias tuning options, e.g. {"myapp.api": {"batch_lines": 200}}"""
+    if not ALIAS_SETTINGS_FILE.exists():
+        return {}
+    with open(ALIAS_SETTINGS_FILE, "r") as f:
+        return json.load(f)
+
+
+_alias_settings = (None, None)  # (alias_settings.json identity, settings)
+_alias_settings_lock = threading.Lock()
+
+
+def get_alias_settings(alias: str) -> dict:
+    """Options for one alias.
+
+    Cached until alias_settings.json gets a new inode, mtime or size; the
+    returned dict is shared and must not be modified.
+    """
+    global _alias_settings
+    try:
+        st = os.stat(ALIAS_SETTINGS_FILE)
+        identity = (st.st_ino, st.st_mtime_ns, st.st_size)
+    except OSError:
+        identity = None
+    with _alias_settings_lock:
+        if _alias_settings[1] is not None and _alias_settings[0] == identity:
+            return _alias_settings[1].get(alias, {})
+
+    settings = load_alias_settings() if identity is not None else {}
+    with _alias_settings_lock:
+        _alias_settings = (identity, settings)
+    return settings.get(alias, {})
+
+
+def update_alias_settings(alias: str, **values):
+    """Set options for an alias; a value of None resets that option to its default"""
+    if not exists_tracked_log(alias):
+        raise ValueError(f"Alias '{alias}' does not exist")
+
+    with store_lock():
+        settings = load_alias_settings()
+        current = settings.get(alias, {})
+        for key, value in values.items():
+            if value is None:
+                current.pop(key, None)
+            else:
+                current[key] = value
+
+        if current:
+            settings[alias] = current
+        else:
+            settings.pop(alias, None)
+
+        write_json_atomic(ALIAS_SETTINGS_FILE, settings)
+    return current
+
+
+def record_log_metadata(alias: str, size: int, inode: int, line_count: int):
+    """Remember the last seen size, inode and line count (SQLite backend only)"""
+    store = get_sqlite_store()
+    if store is not None:
+        store.set_metadata(alias, size, inode, line_count)
+
+
+def get_log_metadata(alias: str) -> dict:
+    store = get_sqlite_store()
+    return store.get_metadata(alias) if store is not None else {}
+
+
+def migrate_store(to: str) -> int:
+    """Move all aliases between the JSON file and SQLite; returns how many were moved.
+
+    The source is kept next to the new store with a .bak suffix.
+    """
+    with store_lock():
+        if to == "sqlite":
+            if TRACKED_LOGS_DB.exists():
+                raise ValueError("Already using the SQLite store")
+            data = load_tracked_logs()
+            from sqlite_store import SQLiteStore
+            tmp = TRACKED_LOGS_DB.with_name(f".{TRACKED_LOGS_DB.name}.{os.getpid()}.tmp")
+            store = SQLiteStore(tmp)
+            store.replace_all(data)
+            store.close()
+            os.replace(tmp, TRACKED_LOGS_DB)
+            if TRACKED_LOGS_FILE.exists():
+                os.replace(TRACKED_LOGS_FILE, TRACKED_LOGS_FILE.with_name(TRACKED_LOGS_FILE.name + ".bak"))
+        elif to == "json":
+            if not TRACKED_LOGS_DB.exists():
+                raise ValueError("Already using the JSON store")
+            data = load_tracked_logs()
+            APP_DIR.mkdir(parents=True, exist_ok=True)
+            write_json_atomic(TRACKED_LOGS_FILE, data)
+            _close_sqlite_store()
+            os.replace(TRACKED_LOGS_DB, TRACKED_LOGS_DB.with_name(TRACKED_LOGS_DB.name + ".bak"))
+        else:
+            raise ValueError(f"Unknown store '{to}' (use 'json' or 'sqlite')")
+    registry.invalidate()
+    return len(data)